@@ -774,7 +774,36 @@ index = {"get_master": "18_callback_fp16.ipynb",
          "fa_collate": "04_data_load.ipynb",
          "fa_convert": "04_data_load.ipynb",
          "SkipItemException": "04_data_load.ipynb",
-         "DataLoader": "04_data_load.ipynb"}
+         "DataLoader": "04_data_load.ipynb",
+         "TfmProfile": "01c_core_transform.ipynb",
+         "split_arr": "01a_core_utils.ipynb",
+         "import_time": "00_test.ipynb",
+         "SharedCache": "01a_core_utils.ipynb",
+         "DataSource.export_shards": "05_data_core.ipynb",
+         "ShardDataSource": "05_data_core.ipynb",
+         "StreamDataSource": "05_data_core.ipynb",
+         "defaults.image_cache": "08_vision_core.ipynb",
+         "ImageCache": "09b_vision_utils.ipynb",
+         "AspectRatioDL": "09c_vision_rect_augment.ipynb",
+         "defaults.shared_cache_pct": "01a_core_utils.ipynb",
+         "make_images": "98_bench.ipynb",
+         "make_texts": "98_bench.ipynb",
+         "make_ints": "98_bench.ipynb",
+         "make_df": "98_bench.ipynb",
+         "time_dl": "98_bench.ipynb",
+         "bench_tfmddl": "98_bench.ipynb",
+         "bench_aug_transforms": "98_bench.ipynb",
+         "bench_batch_aug": "98_bench.ipynb",
+         "bench_sorteddl": "98_bench.ipynb",
+         "bench_lmdl": "98_bench.ipynb",
+         "bench_tabdl": "98_bench.ipynb",
+         "bench_tokenize": "98_bench.ipynb",
+         "benchmarks": "98_bench.ipynb",
+         "run_bench": "98_bench.ipynb",
+         "save_bench": "98_bench.ipynb",
+         "load_bench": "98_bench.ipynb",
+         "compare": "98_bench.ipynb",
+         "main": "98_bench.ipynb"}
 
 modules = ["callback/fp16.py",
            "torch_core.py",
@@ -823,4 +852,6 @@ modules = ["callback/fp16.py",
            "callback/schedule.py",
            "callback/mixup.py",
            "core/utils.py",
-           "data/load.py"]
\ No newline at end of file
+           "data/load.py",
+           "vision/rect_augment.py",
+           "bench.py"]
\ No newline at end of file
@@ -0,0 +1,195 @@
+#AUTOGENERATED! DO NOT EDIT! File to edit: dev/98_bench.ipynb (unless otherwise specified).
+
+__all__ = ['make_images', 'make_texts', 'make_ints', 'make_df', 'time_dl', 'bench_tfmddl', 'bench_aug_transforms',
+           'bench_batch_aug', 'bench_sorteddl', 'bench_lmdl', 'bench_tabdl', 'bench_tokenize', 'benchmarks',
+           'run_bench', 'save_bench', 'load_bench', 'compare', 'main']
+
+#Cell
+import platform
+from .basics import *
+from .vision.all import *
+from .text.all import *
+from .tabular.core import TabularPandas,TabDataLoader,Categorify,FillMissing
+from .tabular.core import Normalize as TabNormalize
+from .version import __version__
+
+#Cell
+def make_images(path, n=256, size=64, n_classes=2, seed=42):
+    "Write `n` random JPEGs of `size` in `path`, in `train`/`valid` folders of `n_classes` classes"
+    path,rng = Path(path),np.random.RandomState(seed)
+    for i in range(n):
+        fn = path/('valid' if i%5==0 else 'train')/f'c{i%n_classes}'/f'{i}.jpg'
+        fn.parent.mkdir(parents=True, exist_ok=True)
+        Image.fromarray(rng.randint(0, 256, (size,size,3), dtype=np.uint8)).save(fn)
+    return path
+
+#Cell
+def make_texts(n=1000, min_len=10, max_len=300, vocab_sz=1000, seed=42):
+    "`n` texts of `min_len` to `max_len` random words, among `vocab_sz`"
+    rng = np.random.RandomState(seed)
+    return L(' '.join(f'w{j}' for j in rng.randint(0, vocab_sz, rng.randint(min_len, max_len))) for _ in range(n))
+
+#Cell
+def make_ints(n=1000, min_len=10, max_len=300, vocab_sz=1000, seed=42):
+    "`n` random tensors of token ids, of `min_len` to `max_len` tokens, labelled 0 or 1"
+    rng = np.random.RandomState(seed)
+    return L((tensor(rng.randint(2, vocab_sz, rng.randint(min_len, max_len))),i%2) for i in range(n))
+
+#Cell
+def make_df(n=10000, n_cat=10, n_cont=40, card=50, p_na=0.05, seed=42):
+    "A `DataFrame` of `n` rows, with `n_cat` categorical columns of cardinality `card`, `n_cont` continuous ones and a `target`"
+    rng = np.random.RandomState(seed)
+    cats = {f'cat{i}': rng.randint(0, card, n) for i in range(n_cat)}
+    conts = {f'cont{i}': np.where(rng.rand(n)<p_na, np.nan, rng.randn(n)) for i in range(n_cont)}
+    return pd.DataFrame({**cats, **conts, 'target': rng.randint(0, 2, n)})
+
+#Cell
+def time_dl(dl, max_batches=None, n_repeat=3):
+    "Best items/sec and batches/sec over `n_repeat` passes over (at most `max_batches` of) `dl`"
+    ts = []
+    for _ in range(n_repeat):
+        n_items,n_batches,start = 0,0,time.perf_counter()
+        for b in itertools.islice(dl, max_batches): n_items,n_batches = n_items+find_bs(b),n_batches+1
+        ts.append((time.perf_counter()-start,n_items,n_batches))
+    t,n_items,n_batches = min(ts)
+    return dict(time=t, n_items=n_items, n_batches=n_batches, items_per_sec=n_items/t, batches_per_sec=n_batches/t)
+
+#Cell
+def bench_tfmddl(data, bs, num_workers, **kwargs):
+    "`TfmdDL` reading and resizing the images of `data`"
+    dbunch = ImageDataBunch.from_folder(data['images'], item_tfms=Resize(data['size']), bs=bs, num_workers=num_workers)
+    return time_dl(dbunch.train_dl, **kwargs)
+
+#Cell
+def bench_aug_transforms(data, bs, num_workers, **kwargs):
+    "`TfmdDL` reading the images of `data` and applying `aug_transforms` on the batches"
+    dbunch = ImageDataBunch.from_folder(data['images'], item_tfms=Resize(data['size']), batch_tfms=aug_transforms(),
+                                        bs=bs, num_workers=num_workers)
+    return time_dl(dbunch.train_dl, **kwargs)
+
+#Cell
+def bench_batch_aug(data, bs, num_workers, n_repeat=3, max_batches=None):
+    "`RandomResizedCropGPU`, `aug_transforms` and `Normalize` on random batches of float images (`num_workers` is ignored)"
+    x,n,ts = TensorImage(torch.rand(bs, 3, 4*data['size'], 4*data['size'])),ifnone(max_batches, 20),[]
+    pipe = Pipeline([RandomResizedCropGPU(data['size'], min_scale=0.35), *aug_transforms(), Normalize(*imagenet_stats, cuda=False)],
+                    split_idx=0)
+    for _ in range(n_repeat):
+        start = time.perf_counter()
+        for _ in range(n): pipe(x)
+        ts.append(time.perf_counter()-start)
+    t = min(ts)
+    return dict(time=t, n_items=n*bs, n_batches=n, items_per_sec=n*bs/t, batches_per_sec=n/t)
+
+#Cell
+def bench_sorteddl(data, bs, num_workers, **kwargs):
+    "`SortedDL` padding the token ids of `data`, setup included"
+    start = time.perf_counter()
+    dl = SortedDL(data['ints'], bs=bs, num_workers=num_workers, shuffle=True, before_batch=pad_input)
+    return {'setup_time': time.perf_counter()-start, **time_dl(dl, **kwargs)}
+
+#Cell
+def bench_lmdl(data, bs, num_workers, **kwargs):
+    "`LMDataLoader` on the token ids of `data`"
+    dl = LMDataLoader(data['ints'].itemgot(0), bs=bs, num_workers=num_workers, shuffle=True)
+    return time_dl(dl, **kwargs)
+
+#Cell
+def bench_tabdl(data, bs, num_workers, **kwargs):
+    "`TabDataLoader` on the processed `DataFrame` of `data`, processing included"
+    df = data['df']
+    start = time.perf_counter()
+    to = TabularPandas(df, [Categorify, FillMissing, TabNormalize], cat_names=[c for c in df.columns if c.startswith('cat')],
+                       cont_names=[c for c in df.columns if c.startswith('cont')], y_names='target')
+    return {'setup_time': time.perf_counter()-start,
+            **time_dl(TabDataLoader(to, bs=bs, num_workers=num_workers, shuffle=True), **kwargs)}
+
+#Cell
+def bench_tokenize(data, bs, num_workers, n_repeat=3, **kwargs):
+    "`parallel_tokenize` with spacy on the texts of `data` (`bs` is ignored and there is always at least one worker)"
+    texts,ts = data['texts'],[]
+    for _ in range(n_repeat):
+        start = time.perf_counter()
+        for _ in parallel_tokenize(texts, SpacyTokenizer, None, n_workers=max(num_workers,1)): pass
+        ts.append(time.perf_counter()-start)
+    t = min(ts)
+    return dict(time=t, n_items=len(texts), items_per_sec=len(texts)/t)
+
+#Cell
+benchmarks = dict(tfmddl=bench_tfmddl, aug_transforms=bench_aug_transforms, batch_aug=bench_batch_aug, sorteddl=bench_sorteddl,
+                  lmdl=bench_lmdl, tabdl=bench_tabdl, tokenize=bench_tokenize)
+
+#Cell
+def _make_data(path, scale=1, seed=42):
+    n = int(scale*1000)
+    return dict(images=make_images(path/'images', n=n//2, seed=seed), size=32, texts=make_texts(n, seed=seed),
+                ints=make_ints(n, seed=seed), df=make_df(10*n, seed=seed))
+
+#Cell
+def _meta():
+    return dict(fastai2=__version__, torch=torch.__version__, python=platform.python_version(),
+                platform=platform.platform(), cpus=defaults.cpus, date=time.strftime('%Y-%m-%d %H:%M:%S'))
+
+#Cell
+def run_bench(names=None, bss=(16,64), num_workers=(0,2), scale=1, n_repeat=3, max_batches=None, seed=42, verbose=True):
+    "Run `benchmarks` in `names` for each batch size in `bss` and each number of workers in `num_workers`"
+    names = L(ifnone(names, list(benchmarks)))
+    res = []
+    with tempfile.TemporaryDirectory() as d:
+        data = _make_data(Path(d), scale=scale, seed=seed)
+        for name,bs,nw in itertools.product(names, bss, num_workers):
+            if (name=='tokenize' and bs!=bss[0]) or (name=='batch_aug' and nw!=num_workers[0]): continue
+            set_seed(seed)
+            r = benchmarks[name](data, bs, nw, n_repeat=n_repeat, max_batches=max_batches)
+            res.append(dict(name=name, bs=bs, num_workers=nw, **r))
+            if verbose: print(f"{name:<15} bs={bs:<4} num_workers={nw:<3} {r['items_per_sec']:>10.1f} items/s")
+    return dict(meta=_meta(), results=res)
+
+#Cell
+def save_bench(res, fn):
+    "Save the results `res` of `run_bench` to the JSON file `fn`"
+    with open(fn, 'w') as f: json.dump(res, f, indent=2)
+
+#Cell
+def load_bench(fn):
+    "Load results of `run_bench` saved with `save_bench`"
+    with open(fn) as f: return json.load(f)
+
+#Cell
+def _key(r): return r['name'],r['bs'],r['num_workers']
+
+def compare(res, base, tol=0.1, verbose=True):
+    "Compare the items/sec of `res` and `base`, flagging the runs more than `tol` slower as regressions"
+    old = {_key(r):r for r in base['results']}
+    cmp = []
+    for r in res['results']:
+        b = old.get(_key(r))
+        if b is None or not b['items_per_sec']: continue
+        ratio = r['items_per_sec']/b['items_per_sec']
+        cmp.append(dict(name=r['name'], bs=r['bs'], num_workers=r['num_workers'], base=b['items_per_sec'],
+                        new=r['items_per_sec'], ratio=ratio, regression=ratio<1-tol))
+        if verbose: print(f"{r['name']:<15} bs={r['bs']:<4} num_workers={r['num_workers']:<3} {b['items_per_sec']:>10.1f}"
+                          f" -> {r['items_per_sec']:>10.1f} items/s ({ratio:.2f}x){'  REGRESSION' if ratio<1-tol else ''}")
+    return cmp
+
+#Cell
+def main(
+    out:Param("JSON file to save the results to", str)=None,
+    baseline:Param("JSON file of results to compare to", str)=None,
+    names:Param("Comma-separated benchmarks to run (default all)", str)=None,
+    bs:Param("Comma-separated batch sizes", str)='16,64',
+    num_workers:Param("Comma-separated numbers of workers", str)='0,2',
+    scale:Param("Scale of the synthetic datasets", float)=1.,
+    n_repeat:Param("Number of timed passes of each benchmark", int)=3,
+    max_batches:Param("Maximum number of batches timed per pass", int)=None,
+    tol:Param("Slowdown compared to `baseline` reported as a regression", float)=0.1
+):
+    "Benchmark the throughput of the data pipeline, optionally comparing it to a baseline"
+    _ints = lambda s: [int(o) for o in s.split(',')]
+    res = run_bench(None if names is None else names.split(','), _ints(bs), _ints(num_workers), scale=scale,
+                    n_repeat=n_repeat, max_batches=max_batches)
+    if out is not None: save_bench(res, out)
+    if baseline is not None and any(o['regression'] for o in compare(res, load_bench(baseline), tol=tol)): sys.exit(1)
+
+#Cell
+#Only parse the command line when run with `python -m fastai2.bench` (not in this notebook)
+if __name__=='__main__' and '__file__' in globals(): call_parse(main)
\ No newline at end of file
@@ -23,7 +23,7 @@ class WeightedDL(TfmdDL):
     def get_idxs(self):
         if self.n==0: return []
         if not self.shuffle: return super().get_idxs()
-        return list(np.random.choice(self.n, self.n, p=self.wgts))
+        return list(np.random.RandomState(self.rng.randint(0,2**32-1)).choice(self.n, self.n, p=self.wgts))
 
 #Cell
 @patch
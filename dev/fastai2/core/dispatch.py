@@ -65,7 +65,7 @@ class _TypeDict:
 class TypeDispatch:
     "Dictionary-like object; `__getitem__` matches keys of types using `issubclass`"
     def __init__(self, *funcs):
-        self.funcs = _TypeDict()
+        self.funcs,self.cache,self.ret_cache = _TypeDict(),{},{}
         for o in funcs: self.add(o)
         self.inst = None
 
@@ -77,12 +77,16 @@ class TypeDispatch:
             t = _TypeDict()
             self.funcs.add(a0, t)
         t.add(a1, f)
+        self.cache,self.ret_cache = {},{}
 
     def first(self): return self.funcs.first().first()
     def returns(self, x): return anno_ret(self[type(x)])
     def returns_none(self, x):
-        r = anno_ret(self[type(x)])
-        return r if r == NoneType else None
+        t = type(x)
+        if t not in self.ret_cache:
+            r = anno_ret(self[t])
+            self.ret_cache[t] = r if r == NoneType else None
+        return self.ret_cache[t]
 
     def _attname(self,k): return getattr(k,'__name__',str(k))
     def __repr__(self):
@@ -91,10 +95,9 @@ class TypeDispatch:
         return '\n'.join(r)
 
     def __call__(self, *args, **kwargs):
-        ts = L(args).map(type)[:2]
-        f = self[tuple(ts)]
+        f = self[tuple(map(type, args[:2]))]
         if not f: return args[0]
-        if self.inst is not None: f = types.MethodType(f, self.inst)
+        if self.inst is not None: return f(self.inst, *args, **kwargs)
         return f(*args, **kwargs)
 
     def __get__(self, inst, owner):
@@ -103,12 +106,15 @@ class TypeDispatch:
 
     def __getitem__(self, k):
         "Find first matching type that is a super-class of `k`"
-        k = L(k if isinstance(k, tuple) else (k,))
-        while len(k)<2: k.append(object)
-        r = self.funcs.all_matches(k[0])
-        if len(r)==0: return None
+        k = k if isinstance(k, tuple) else (k,)
+        try: return self.cache[k]
+        except KeyError: res = self.cache[k] = self._lookup(*k)
+        return res
+
+    def _lookup(self, k0=object, k1=object):
+        r = self.funcs.all_matches(k0)
         for t in r:
-            o = t[k[1]]
+            o = t[k1]
             if o is not None: return o
         return None
 
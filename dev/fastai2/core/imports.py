@@ -1,6 +1,7 @@
 import io,operator,sys,os,re,os,mimetypes,csv,itertools,json,shutil,glob,pickle,tarfile,collections
 import hashlib,itertools,types,random,inspect,functools,random,time,math,bz2,types,typing,numbers,string
-import multiprocessing,threading,urllib,ipykernel,tempfile,concurrent.futures,matplotlib,warnings,zipfile
+import multiprocessing,threading,urllib,tempfile,concurrent.futures,warnings,zipfile,importlib,subprocess,atexit,queue,mmap,fcntl,struct
+import importlib.abc,importlib.util
 
 from concurrent.futures import as_completed
 from functools import partial,reduce
@@ -8,7 +9,7 @@ from itertools import starmap,dropwhile,takewhile,zip_longest
 from copy import copy,deepcopy
 from multiprocessing import Lock,Process,Queue,queues
 from datetime import datetime
-from contextlib import redirect_stdout,contextmanager
+from contextlib import redirect_stdout,contextmanager,ExitStack
 from collections.abc import Iterable,Iterator,Generator,Sequence
 from typing import Union,Optional
 from types import SimpleNamespace
@@ -20,12 +21,73 @@ from textwrap import TextWrapper
 from operator import itemgetter,attrgetter,methodcaller
 from urllib.request import urlopen
 
-# External modules
-import requests,yaml,matplotlib.pyplot as plt,numpy as np,pandas as pd,scipy
-from pandas.api.types import is_categorical_dtype,is_numeric_dtype
+class LazyModule:
+    "Module `name`, only imported on first access to one of its attributes"
+    def __init__(self, name): self.__dict__.update(_name=name, _mod=None, _hooks=[])
+    def on_load(self, f):
+        "Call `f` with the module once it's imported, here or by any other code"
+        if self._mod is None and self._name in sys.modules: self._loaded(sys.modules[self._name])
+        if self._mod is not None: return f(self._mod)
+        self._hooks.append(f)
+        _on_import.add(self)
+
+    def _loaded(self, mod):
+        if self._mod is not None: return
+        self.__dict__['_mod'] = mod
+        for f in self._hooks: f(mod)
+
+    def _load(self):
+        if self._mod is None: self._loaded(importlib.import_module(self._name))
+        return self._mod
+
+    def __getattr__(self, k):
+        if k.startswith('_') and k not in ('__version__','__file__','__path__','__name__'): raise AttributeError(k)
+        mod = self._load()
+        try: return getattr(mod, k)
+        except AttributeError: return importlib.import_module(f'{self._name}.{k}')
+
+    def __setattr__(self, k, v): setattr(self._load(), k, v)
+    def __dir__(self): return dir(self._load())
+    def __repr__(self): return f"<lazy module '{self._name}'>" if self._mod is None else repr(self._mod)
+
+class _OnImport(importlib.abc.MetaPathFinder):
+    "Run the `on_load` hooks of `LazyModule`s as soon as their module is imported, even by the user"
+    def __init__(self): self.mods = {}
+    def add(self, lm): self.mods.setdefault(lm._name, []).append(lm)
+    def find_spec(self, name, path, target=None):
+        lms = self.mods.pop(name, None)
+        if lms is None: return None
+        spec = importlib.util.find_spec(name)
+        if spec is None or not hasattr(spec.loader, 'exec_module'):
+            if spec is None: self.mods[name] = lms
+            return spec
+        exec_module = spec.loader.exec_module
+        def _exec(mod):
+            exec_module(mod)
+            for lm in lms: lm._loaded(mod)
+        spec.loader.exec_module = _exec
+        return spec
+
+_on_import = _OnImport()
+sys.meta_path.insert(0, _on_import)
+
+# External modules (the heavy optional ones are only imported when first used)
+import numpy as np
 from numpy import array,ndarray
-from scipy import ndimage
-from IPython.core.debugger import set_trace
+matplotlib,plt = LazyModule('matplotlib'),LazyModule('matplotlib.pyplot')
+pd,scipy,ndimage = LazyModule('pandas'),LazyModule('scipy'),LazyModule('scipy.ndimage')
+requests,yaml,ipykernel = LazyModule('requests'),LazyModule('yaml'),LazyModule('ipykernel')
+skm,spacy = LazyModule('sklearn.metrics'),LazyModule('spacy')
+patches,patheffects = LazyModule('matplotlib.patches'),LazyModule('matplotlib.patheffects')
+pd.on_load(lambda pd: setattr(pd.options.display, 'max_colwidth', 600))
+
+def is_categorical_dtype(arr_or_dtype): return pd.api.types.is_categorical_dtype(arr_or_dtype)
+def is_numeric_dtype  (arr_or_dtype): return pd.api.types.is_numeric_dtype  (arr_or_dtype)
+
+def set_trace(frame=None):
+    "Start the IPython debugger in the caller's frame"
+    from IPython.core.debugger import set_trace
+    set_trace(frame or sys._getframe().f_back)
 
 try:
     from types import WrapperDescriptorType,MethodWrapperType,MethodDescriptorType
@@ -35,7 +97,6 @@ except ImportError:
     MethodDescriptorType = type(str.join)
 from types import BuiltinFunctionType,BuiltinMethodType,MethodType,FunctionType
 
-pd.options.display.max_colwidth = 600
 NoneType = type(None)
 string_classes = (str,bytes)
 
@@ -2,7 +2,7 @@
 
 __all__ = ['ArrayBase', 'ArrayImageBase', 'ArrayImage', 'ArrayImageBW', 'ArrayMask', 'Transform', 'InplaceTransform',
            'TupleTransform', 'ItemTransform', 'get_func', 'Func', 'Sig', 'compose_tfms', 'mk_transform', 'gather_attrs',
-           'gather_attr_names', 'Pipeline']
+           'gather_attr_names', 'TfmProfile', 'Pipeline']
 
 #Cell
 from .imports import *
@@ -10,7 +10,6 @@ from .foundation import *
 from .utils import *
 from .dispatch import *
 from ..test import *
-from nbdev.showdoc import show_doc
 
 #Cell
 class ArrayBase(ndarray):
@@ -64,6 +63,9 @@ class _TfmMeta(type):
     @classmethod
     def __prepare__(cls, name, bases): return _TfmDict()
 
+#Cell
+def _same_type(xs): return len(set(map(type, xs)))==1
+
 #Cell
 class Transform(metaclass=_TfmMeta):
     "Delegates (`__call__`,`decode`,`setup`) to (`encodes`,`decodes`,`setups`) if `split_idx` matches"
@@ -99,7 +101,29 @@ class Transform(metaclass=_TfmMeta):
     def _do_call(self, f, x, **kwargs):
         return x if f is None else retain_type(f(x, **kwargs), x, f.returns_none(x))
 
-add_docs(Transform, decode="Delegate to `decodes` to undo transform", setup="Delegate to `setups` to set up transform")
+    def encode_batch(self, xs, **kwargs): return self._call_batch('encodes', xs, **kwargs)
+    def decode_batch(self, xs, **kwargs): return self._call_batch('decodes', xs, **kwargs)
+
+    def _call_batch(self, fn, xs, split_idx=None, **kwargs):
+        if split_idx!=self.split_idx and self.split_idx is not None: return xs
+        f = getattr(self, fn+'_batch', None)
+        if f is not None and len(xs)>0 and _same_type(xs):
+            if self.use_as_item or not is_listy(xs[0]): return self._do_batch(fn, f, xs, **kwargs)
+            if isinstance(xs[0], (tuple,list,L)) and len(set(map(len, xs)))==1:
+                cols = [self._do_batch(fn, f, list(c), **kwargs) for c in zip(*xs)]
+                return [retain_type(tuple(o), x) for o,x in zip(zip(*cols), xs)]
+        # Through `__call__` (`decode`) since subclasses (like `RandTransform`) can override it to draw a state for each item
+        f = self.__call__ if fn=='encodes' else self.decode
+        return [f(x, split_idx=split_idx, **kwargs) for x in xs]
+
+    def _do_batch(self, fn, f, xs, **kwargs):
+        td = getattr(self, fn)
+        if not _same_type(xs): return [self._do_call(td, x, **kwargs) for x in xs]
+        return xs if td[type(xs[0])] is None else f(xs, **kwargs)
+
+add_docs(Transform, decode="Delegate to `decodes` to undo transform", setup="Delegate to `setups` to set up transform",
+         encode_batch="Transform a list of items `xs`, with `encodes_batch` if defined",
+         decode_batch="Undo the transform on a list of items `xs`, with `decodes_batch` if defined")
 
 #Cell
 class InplaceTransform(Transform):
@@ -169,11 +193,105 @@ def gather_attr_names(o, nm):
     "Used in __dir__ to collect all attrs `k` from `self.{nm}`"
     return L(getattr(o,nm)).map(dir).concat().unique()
 
+#Cell
+class _CompiledTfm:
+    "`t` calling the functions it dispatches to on inputs of type `typ` with parts of `types` directly"
+    def __init__(self, t, typ, types, as_item):
+        store_attr(self, 't,typ,types,as_item')
+        td = t.encodes
+        self.fs = [self._resolve(td, o) for o in types]
+        self.noop = all(f is None for f in self.fs) and (as_item or typ is tuple)
+
+    @staticmethod
+    def _resolve(td, typ):
+        f = td[typ]
+        if f is None: return None
+        r = anno_ret(f)
+        return (f if td.inst is None else MethodType(f, td.inst)),(r if r==NoneType else None)
+
+    def __call__(self, x, split_idx=None):
+        xs = (x,) if self.as_item else x
+        if type(x) is not self.typ or tuple(map(type,xs))!=self.types: return self.t(x, split_idx=split_idx)
+        if self.noop: return x
+        res = tuple(x_ if f is None else retain_type(f[0](x_), x_, f[1]) for f,x_ in zip(self.fs,xs))
+        return res[0] if self.as_item else retain_type(res, x)
+
+    def __reduce__(self): return (_CompiledTfm, (self.t,self.typ,self.types,self.as_item))
+    def __repr__(self): return f"{self.t} compiled for {self.typ.__name__}"
+
+#Cell
+def _compile_tfm(t, x):
+    "Version of `t` specialized to inputs of the same types as `x`, or `t` if it has custom call logic"
+    if any(getattr(type(t),n) is not getattr(Transform,n) for n in ('__call__','_call','_do_call')): return t
+    as_item = t.use_as_item or not is_listy(x)
+    if not as_item and not isinstance(x, (tuple,list,L)): return t
+    return _CompiledTfm(t, type(x), tuple(map(type, (x,) if as_item else x)), as_item)
+
+#Cell
+def _nbytes(o):
+    "Size in memory of the tensors, arrays and images in `o`"
+    if hasattr(o, 'element_size'): return o.element_size()*o.numel()
+    if isinstance(o, ndarray): return o.nbytes
+    if hasattr(o, 'getbands'): return o.width*o.height*len(o.getbands())
+    if isinstance(o, (tuple,list,L)): return sum(map(_nbytes, o))
+    return 0
+
+#Cell
+def _tfm_name(t):
+    f = getattr(t, 'init_enc', None)
+    return getattr(f, '__name__', type(t).__name__) if f else type(t).__name__
+
+#Cell
+class _ProfiledTfm:
+    "Record the calls to `f` (and its `encode_batch`) in `prof[key]`, counting items if `batched`"
+    def __init__(self, f, prof, key, batched=False): store_attr(self, 'f,prof,key,batched')
+    def __call__(self, *args, **kwargs):
+        return self.prof.record(self.key, len(args[0]) if self.batched else 1, self.f, *args, **kwargs)
+    def encode_batch(self, xs, **kwargs): return self.prof.record(self.key, len(xs), self.f.encode_batch, xs, **kwargs)
+    def __getattr__(self, k):
+        if k in ('f','prof','key','batched'): raise AttributeError(k)
+        return getattr(self.f, k)
+
+#Cell
+class TfmProfile(dict):
+    "Total time, number of calls and output size of transforms (or any function), indexed by `(stage,idx,name)`"
+    def record(self, key, n, f, *args, **kwargs):
+        start = time.perf_counter()
+        res = f(*args, **kwargs)
+        self.add(key, time.perf_counter()-start, n, _nbytes(res))
+        return res
+
+    def add(self, key, t, n, nbytes):
+        s = self.setdefault(key, [0.,0,0])
+        s[0] += t; s[1] += n; s[2] += nbytes
+
+    def merge(self, prof):
+        for k,v in prof.items(): self.add(k, *v)
+        return self
+
+    def wrap(self, f, key, batched=False): return _ProfiledTfm(f, self, key, batched=batched)
+
+    def report(self):
+        return pd.DataFrame([(s,nm,n,t,1e3*t/max(n,1),nb/max(n,1)) for (s,_,nm),(t,n,nb) in self.items()],
+                            columns=['stage','transform','calls','time','ms/call','bytes/call'])
+
+#Cell
+def _fuse_tfms(tfms, split_idx):
+    "Transforms of `tfms` used with `split_idx`, replacing consecutive ones by the result of their `fuse` when it isn't `None`"
+    res = []
+    for t in tfms:
+        if t.split_idx is not None and t.split_idx!=split_idx: continue
+        fuse = getattr(res[-1], 'fuse', None) if res and isinstance(res[-1],Transform) and isinstance(t,Transform) else None
+        f = None if fuse is None else fuse(t)
+        if f is None: res.append(t)
+        else: res[-1] = f
+    return res
+
 #Cell
 class Pipeline:
     "A pipeline of composed (for encode/decode) transforms, setup with types"
     def __init__(self, funcs=None, as_item=False, split_idx=None):
-        self.split_idx,self.default = split_idx,None
+        self.split_idx,self.default,self.compiled,self.fused = split_idx,None,{},{}
         if isinstance(funcs, Pipeline): self.fs = funcs.fs
         else:
             if isinstance(funcs, Transform): funcs = [funcs]
@@ -185,8 +303,13 @@ class Pipeline:
             setattr(self, name, f)
         self.set_as_item(as_item)
 
+    @property
+    def fs(self): return self._fs
+    @fs.setter
+    def fs(self, fs): self._fs,self.compiled,self.fused = fs,{},{}
+
     def set_as_item(self, as_item):
-        self.as_item = as_item
+        self.as_item,self.compiled,self.fused = as_item,{},{}
         for f in self.fs: f.as_item = as_item
 
     def setup(self, items=None):
@@ -197,8 +320,59 @@ class Pipeline:
     def add(self,t, items=None):
         t.setup(items)
         self.fs.append(t)
-
-    def __call__(self, o): return compose_tfms(o, tfms=self.fs, split_idx=self.split_idx)
+        self.compiled,self.fused = {},{}
+
+    @contextmanager
+    def profile(self, prof=None, stage=''):
+        prof,fs,compiled = ifnone(prof, TfmProfile()),self.fs,self.compiled
+        wrapped = {id(t):prof.wrap(t, (stage,i,_tfm_name(t))) for i,t in enumerate(fs)}
+        self.fs = fs.map(lambda t: wrapped[id(t)])
+        def _wrap(t, i):
+            w = wrapped.get(id(t.t if isinstance(t,_CompiledTfm) else t))
+            # The results of `fuse` aren't in `fs`, so they get their own key
+            return prof.wrap(t, (stage,i,_tfm_name(t.t if isinstance(t,_CompiledTfm) else t)) if w is None else w.key)
+        self.compiled = {k:[_wrap(t,i) for i,t in enumerate(tfms)] for k,tfms in compiled.items()}
+        try: yield prof
+        finally: self.fs,self.compiled = fs,compiled
+
+    def compile(self, o, split_idx=None):
+        split_idx,tfms = ifnone(split_idx, self.split_idx),[]
+        for t in _fuse_tfms(self.fs, split_idx):
+            tfms.append(_compile_tfm(t, o))
+            o = tfms[-1](o, split_idx=split_idx)
+        self.compiled[split_idx] = tfms
+        return self
+
+    def _fused_tfms(self):
+        if self.split_idx not in self.fused: self.fused[self.split_idx] = _fuse_tfms(self.fs, self.split_idx)
+        return self.fused[self.split_idx]
+
+    def __call__(self, o):
+        tfms = self.compiled[self.split_idx] if self.split_idx in self.compiled else self._fused_tfms()
+        return compose_tfms(o, tfms=tfms, split_idx=self.split_idx)
+    def _batch_runs(self, nm):
+        "`fs` (reversed to decode) in runs of transforms with and without `nm`, the latter fused when encoding"
+        k,enc = (nm,self.split_idx),nm=='encodes_batch'
+        if k not in self.fused:
+            runs = [(b,list(g)) for b,g in itertools.groupby(self.fs if enc else self.fs[::-1], key=lambda f: hasattr(f, nm))]
+            self.fused[k] = [(b, _fuse_tfms(g, self.split_idx) if enc and not b else g) for b,g in runs]
+        return self.fused[k]
+
+    def encode_batch(self, os):
+        if not any(hasattr(f, 'encodes_batch') for f in self.fs): return [self(o) for o in os]
+        for b,tfms in self._batch_runs('encodes_batch'):
+            if b:
+                for f in tfms: os = f.encode_batch(os, split_idx=self.split_idx)
+            else: os = [compose_tfms(o, tfms=tfms, split_idx=self.split_idx) for o in os]
+        return list(os)
+
+    def decode_batch(self, os):
+        if not any(hasattr(f, 'decodes_batch') for f in self.fs): return [self.decode(o) for o in os]
+        for b,tfms in self._batch_runs('decodes_batch'):
+            if b:
+                for f in tfms: os = f.decode_batch(os, split_idx=self.split_idx)
+            else: os = [compose_tfms(o, tfms=tfms, is_enc=False, split_idx=self.split_idx) for o in os]
+        return list(os)
     def __repr__(self): return f"Pipeline: {self.fs}"
     def __getitem__(self,i): return self.fs[i]
     def __setstate__(self,data): self.__dict__.update(data)
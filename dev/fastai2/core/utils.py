@@ -2,14 +2,14 @@
 
 __all__ = ['ifnone', 'get_class', 'mk_class', 'wrap_class', 'store_attr', 'attrdict', 'properties', 'camel2snake',
            'snake2camel', 'class2attr', 'hasattrs', 'tuplify', 'detuplify', 'replicate', 'uniqueify', 'setify', 'merge',
-           'is_listy', 'range_of', 'groupby', 'first', 'shufflish', 'IterLen', 'ReindexCollection', 'lt', 'gt', 'le',
-           'ge', 'eq', 'ne', 'add', 'sub', 'mul', 'truediv', 'is_', 'is_not', 'Inf', 'true', 'stop', 'gen', 'chunked',
-           'retain_type', 'retain_types', 'show_title', 'ShowTitle', 'Int', 'Float', 'Str', 'num_methods',
-           'rnum_methods', 'inum_methods', 'Tuple', 'TupleTitled', 'trace', 'compose', 'maps', 'partialler', 'mapped',
-           'instantiate', 'Self', 'Self', 'bunzip', 'join_path_file', 'sort_by_run', 'subplots', 'show_image',
-           'show_titled_image', 'show_images', 'ArrayBase', 'ArrayImageBase', 'ArrayImage', 'ArrayImageBW', 'ArrayMask',
-           'PrettyString', 'get_empty_df', 'display_df', 'round_multiple', 'even_mults', 'num_cpus', 'add_props',
-           'change_attr', 'change_attrs']
+           'is_listy', 'range_of', 'groupby', 'first', 'shufflish', 'IterLen', 'SharedCache', 'ReindexCollection', 'lt',
+           'gt', 'le', 'ge', 'eq', 'ne', 'add', 'sub', 'mul', 'truediv', 'is_', 'is_not', 'Inf', 'true', 'stop', 'gen',
+           'chunked', 'retain_type', 'retain_types', 'split_arr', 'show_title', 'ShowTitle', 'Int', 'Float', 'Str',
+           'num_methods', 'rnum_methods', 'inum_methods', 'Tuple', 'TupleTitled', 'trace', 'compose', 'maps',
+           'partialler', 'mapped', 'instantiate', 'Self', 'Self', 'bunzip', 'join_path_file', 'sort_by_run', 'subplots',
+           'show_image', 'show_titled_image', 'show_images', 'ArrayBase', 'ArrayImageBase', 'ArrayImage',
+           'ArrayImageBW', 'ArrayMask', 'PrettyString', 'get_empty_df', 'display_df', 'round_multiple', 'even_mults',
+           'num_cpus', 'add_props', 'change_attr', 'change_attrs']
 
 #Cell
 from ..test import *
@@ -168,16 +168,159 @@ class IterLen:
     "Base class to add iteration to anything supporting `len` and `__getitem__`"
     def __iter__(self): return (self[i] for i in range_of(self))
 
+#Cell
+defaults.shared_cache_pct = 0.25
+
+def _rm_cache_dir(path, pid):
+    if os.getpid()==pid: shutil.rmtree(path, ignore_errors=True)
+
+def _entry_stat(e):
+    try: st = e.stat()
+    except FileNotFoundError: return None
+    return st.st_mtime,st.st_size,e.path
+
+class _CacheIndex:
+    "Sizes of the items written by this process in LRU order, and the total size of the cache, kept in a file of `path`"
+    def __init__(self, path): self.path,self.pid = Path(path),None
+    # Each process keeps track of its own items, so workers start with an empty index
+    def __reduce__(self): return (self.__class__, (self.path,))
+
+    def _check_pid(self):
+        if self.pid == os.getpid(): return
+        self.pid,self.items,self.lock = os.getpid(),OrderedDict(),threading.Lock()
+        self.fd = os.open(self.path/'.size', os.O_RDWR|os.O_CREAT)
+
+    @contextmanager
+    def _locked(self):
+        self._check_pid()
+        with self.lock:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+            try: yield
+            finally: fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+    def _write(self, total): os.pwrite(self.fd, struct.pack('q', total), 0); return total
+    def add(self, delta):
+        "Add `delta` bytes to the total size and return it"
+        with self._locked():
+            b = os.pread(self.fd, 8, 0)
+            return self._write((struct.unpack('q', b)[0] if len(b)==8 else 0) + delta)
+
+    def recount(self):
+        "Set the total size to the size of the files in `path` and return it"
+        with self._locked():
+            return self._write(sum(o[1] for o in map(_entry_stat, os.scandir(self.path)) if o is not None and not Path(o[2]).name.startswith('.')))
+
+#Cell
+@docs
+class SharedCache:
+    "LRU cache of pickled objects in a temporary directory of `path`, bounded to about `max_size` bytes and shared between processes"
+    def __init__(self, max_size=None, path=None, prefix=''):
+        if path is not None: Path(path).mkdir(parents=True, exist_ok=True)
+        # Items are only valid while the data and transforms that made them exist, so the directory is always new
+        path = tempfile.mkdtemp(prefix='fastai_cache_', dir=ifnone(path, '/dev/shm' if os.path.isdir('/dev/shm') else None))
+        atexit.register(_rm_cache_dir, path, os.getpid())
+        self.path,self.prefix,self.index = Path(path),prefix,_CacheIndex(path)
+        # Filling `/dev/shm` would get the workers killed by the OS, so the cache is always bounded
+        self.max_size = int(shutil.disk_usage(self.path).free*defaults.shared_cache_pct) if max_size is None else max_size
+
+    def _fn(self, k): return self.path/f'{self.prefix}{k}'
+    def _files(self): return [e for e in os.scandir(self.path) if e.name.startswith(self.prefix) and not e.name.startswith('.')]
+    def __contains__(self, k): return self._fn(k).exists()
+    def __len__(self): return len(self._files())
+    def __repr__(self): return f'{self.__class__.__name__}: {self.path}/{self.prefix}*'
+    def sub(self, name):
+        res = copy(self)
+        res.prefix = f'{self.prefix}{name}-'
+        return res
+
+    def __getitem__(self, k):
+        fn = self._fn(k)
+        with open(fn, 'rb') as f: res = pickle.load(f)
+        self.index._check_pid()
+        if fn.name in self.index.items: self.index.items.move_to_end(fn.name)
+        return res
+
+    def __setitem__(self, k, v):
+        fn,tmp = self._fn(k),self.path/f'.{os.getpid()}-{threading.get_ident()}.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump(v, f, pickle.HIGHEST_PROTOCOL)
+            sz = f.tell()
+        try: old = os.stat(fn).st_size
+        except FileNotFoundError: old = 0
+        os.replace(tmp, fn)
+        total = self.index.add(sz-old)
+        self.index.items[fn.name] = sz
+        self.index.items.move_to_end(fn.name)
+        if total > self.max_size: self._evict_own(total)
+
+    def _evict_own(self, total):
+        "Remove the least recently used items written by this process until the cache is under `max_size` bytes"
+        items,freed = self.index.items,0
+        while items and total-freed > self.max_size:
+            name,sz = items.popitem(last=False)
+            try: os.remove(self.path/name); freed += sz
+            except FileNotFoundError: pass
+        total = self.index.add(-freed)
+        # What's left was written by other processes, so this one knows nothing about it
+        if total > self.max_size: self.evict()
+
+    def get(self, k, default=None):
+        try: return self[k]
+        except FileNotFoundError: return default
+
+    def get_many(self, ks):
+        res = {}
+        for k in ks:
+            try: res[k] = self[k]
+            except FileNotFoundError: pass
+        return res
+
+    def evict(self):
+        entries = sorted(o for o in map(_entry_stat, os.scandir(self.path)) if o is not None and not Path(o[2]).name.startswith('.'))
+        # Going a bit under `max_size` means this is only needed again after `max_size/8` bytes are written
+        total = sum(o[1] for o in entries)
+        for _,sz,fn in entries:
+            if total <= self.max_size*7//8: break
+            try: os.remove(fn)
+            except FileNotFoundError: pass
+            total -= sz
+        self.index.recount()
+
+    def clear(self):
+        for e in self._files():
+            try: os.remove(e.path)
+            except FileNotFoundError: pass
+            self.index.items.pop(e.name, None)
+        self.index.recount()
+
+    def __call__(self, f):
+        @functools.wraps(f)
+        def _inner(k):
+            try: return self[k]
+            except FileNotFoundError: pass
+            res = self[k] = f(k)
+            return res
+        _inner.cache_clear = self.clear
+        return _inner
+
+    _docs = dict(sub="A view of this cache that prefixes its keys with `name`, sharing the same storage and size limit",
+                 get="Item at `k` if it's in the cache, `default` otherwise",
+                 get_many="Dictionary with the items of `ks` that are in the cache",
+                 evict="Remove the oldest items of the whole cache until it's under `max_size` bytes",
+                 clear="Remove all the items with this cache's prefix",
+                 __call__="Decorator: cache the results of `f`, a function of one key, in `self`")
+
 #Cell
 @docs
 class ReindexCollection(GetAttr, IterLen):
-    "Reindexes collection `coll` with indices `idxs` and optional LRU cache of size `cache`"
+    "Reindexes collection `coll` with indices `idxs` and optional LRU cache of size `cache` (or a `SharedCache`)"
     _default='coll'
     def __init__(self, coll, idxs=None, cache=None):
         self.coll,self.idxs,self.cache = coll,ifnone(idxs,L.range(coll)),cache
         def _get(self, i): return self.coll[i]
         self._get = types.MethodType(_get,self)
-        if cache is not None: self._get = functools.lru_cache(maxsize=cache)(self._get)
+        if isinstance(cache, int): self._get = functools.lru_cache(maxsize=cache)(self._get)
+        elif cache is not None: self._get = cache(self._get)
 
     def __getitem__(self, i): return self._get(self.idxs[i])
     def __len__(self): return len(self.coll)
@@ -262,8 +405,7 @@ def retain_types(new, old=None, typs=None):
     return type(new)(L(new, old, typs).map_zip(retain_type, cycled=True))
 
 #Cell
-@patch
-def split_arr(df:pd.DataFrame, from_col):
+def split_arr(df, from_col):
     "Split col `from_col` (containing arrays) in `DataFrame` `df` into separate colums"
     col = df[from_col]
     n = len(col.iloc[0])
@@ -271,6 +413,8 @@ def split_arr(df:pd.DataFrame, from_col):
     df[cols] = pd.DataFrame(df[from_col].values.tolist())
     df.drop(columns=from_col, inplace=True)
 
+pd.on_load(lambda pd: patch_to(pd.DataFrame)(split_arr))
+
 #Cell
 def show_title(o, ax=None, ctx=None, label=None, color='black', **kwargs):
     "Set title of `ax` to `o`, or print `o` if `ax` is `None`"
@@ -520,13 +664,15 @@ def sort_by_run(fs):
     return res
 
 #Cell
-@delegates(plt.subplots, keep=True)
 def subplots(nrows=1, ncols=1, figsize=None, imsize=4, **kwargs):
     if figsize is None: figsize=(imsize*ncols,imsize*nrows)
     fig,ax = plt.subplots(nrows, ncols, figsize=figsize, **kwargs)
     if nrows*ncols==1: ax = array([ax])
     return fig,ax
 
+# matplotlib is only imported when needed, so the signature of `plt.subplots` is added then
+plt.on_load(lambda plt: delegates(plt.subplots, keep=True)(subplots))
+
 #Cell
 def show_image(im, ax=None, figsize=None, title=None, ctx=None, **kwargs):
     "Show a PIL or PyTorch image on `ax`."
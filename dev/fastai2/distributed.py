@@ -43,16 +43,37 @@ def setup_distrib(gpu=None):
 #Cell
 @delegates()
 class DistributedDL(TfmdDL):
+    _epoch_attrs = TfmdDL._epoch_attrs + ['epoch']
 
-    def __init__(self, dataset, rank, world_size, **kwargs):
+    def __init__(self, dataset, rank, world_size, batch_dl=None, **kwargs):
         super().__init__(dataset, **kwargs)
         if self.n%world_size != 0: self.n += world_size-self.n%world_size
         self.total_n,self.n = self.n,self.n//world_size
-        store_attr(self, 'rank,world_size')
+        store_attr(self, 'rank,world_size,batch_dl')
+        self.max_tokens = getattr(batch_dl, 'max_tokens', None)
 
     def get_idxs(self):
-        idxs = Inf.count if self.indexed else Inf.nones
-        return idxs if self.n is None else list(itertools.islice(idxs, self.total_n))
+        if self.batch_dl is not None: return self._shard_batches()
+        idxs = list(itertools.islice(Inf.count if self.indexed else Inf.nones, self.total_n))
+        if self.shuffle: idxs = self.shuffle_fn(idxs)
+        # add extra samples to make it evenly divisible
+        idxs += idxs[:(self.total_n - len(idxs))]
+        # subsample
+        return idxs[self.rank:self.total_n:self.world_size]
+
+    def _shard_batches(self):
+        "Batches of `batch_dl` for the epoch (the same on each training process), padded to a multiple of `world_size`"
+        self.batch_dl.rng = random.Random(getattr(self, 'epoch', 0))
+        bs = self.batch_dl.get_idxs()
+        bs = bs + bs[:-len(bs)%self.world_size]
+        return bs[self.rank::self.world_size]
+
+    def sample(self):
+        if self.batch_dl is None: return super().sample()
+        idxs = self.get_idxs() if self._idxs is None else self._idxs[self._n_skip:]
+        return (b for i,b in enumerate(idxs) if i%self.nw==self.offs)
+
+    def __len__(self): return super().__len__() if self.batch_dl is None else len(self._shard_batches())
 
     def shuffle_fn(self, idxs):
         "Deterministically shuffle on each training process based on epoch."
@@ -60,27 +81,27 @@ class DistributedDL(TfmdDL):
         g.manual_seed(self.epoch)
         return L(idxs)[torch.randperm(self.total_n, generator=g)]
 
-    def sample(self):
-        idxs = self.get_idxs()
-        if self.shuffle: idxs = self.shuffle_fn(idxs)
-        # add extra samples to make it evenly divisible
-        idxs += idxs[:(self.total_n - len(idxs))]
-        # subsample
-        idxs = idxs[self.rank:self.total_n:self.world_size]
-        return (b for i,b in enumerate(idxs) if i//(self.bs or 1)%self.nw==self.offs)
-
     def create_item(self, s):
         if s is not None and s >= len(self.dataset): s = s%len(self.dataset)
         return super().create_item(s)
 
     def set_epoch(self, epoch): self.epoch = epoch
 
+    def state_dict(self): return {**super().state_dict(), 'epoch': getattr(self, 'epoch', None)}
+    def load_state_dict(self, sd):
+        super().load_state_dict(sd)
+        if sd['epoch'] is not None: self.epoch = sd['epoch']
+
     @classmethod
     def from_dl(cls, dl, rank, world_size, **kwargs):
         cur_kwargs = dict(num_workers=dl.fake_l.num_workers, pin_memory=dl.pin_memory, timeout=dl.timeout,
-                          bs=dl.bs, shuffle=dl.shuffle, drop_last=dl.drop_last, indexed=dl.indexed)
+                          bs=dl.bs, shuffle=dl.shuffle, drop_last=dl.drop_last, indexed=dl.indexed,
+                          persistent_workers=dl.fake_l.persistent_workers, prefetch=dl.prefetch,
+                          worker_type=dl.worker_type)
         cur_kwargs.update({n: getattr(dl, n) for n in cls._methods if n not in "get_idxs sample shuffle_fn create_item".split()})
-        return cls(dl.dataset, rank, world_size, **merge(cur_kwargs, kwargs))
+        # Loaders packing their own batches of indices (like `SortedDL` with `max_tokens` or `AspectRatioDL`) are sharded by batch
+        batch_dl = copy(dl) if getattr(dl, 'packs_batches', False) else None
+        return cls(dl.dataset, rank, world_size, batch_dl=batch_dl, **merge(cur_kwargs, kwargs))
 
 #Cell
 class DistributedTrainer(Callback):
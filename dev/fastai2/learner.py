@@ -167,6 +167,26 @@ def _try_concat(o):
     try:    return torch.cat(o)
     except: return sum([L(o_[i,:] for i in range_of(o_)) for o_ in o], L())
 
+def _overrides_call(cb): return type(cb).__call__ is not Callback.__call__
+def _cb_func(cb, event_name):
+    "Function called by `cb` on `event_name`, or `None` if it doesn't implement it"
+    if _overrides_call(cb): return partial(cb, event_name)
+    return getattr(cb, event_name, None)
+
+class _CbList(L):
+    "`L` of the callbacks of `learn`, that resets its table of callbacks by event when changed in place"
+    def __init__(self, items, learn): super().__init__(items); self.learn = learn
+    def _new(self, items, *args, **kwargs): return L(items, *args, use_list=None, **kwargs)
+    def _changed(self, res): self.learn._cb_tbl = None; return res
+    def append(self, o): return self._changed(super().append(o))
+    def remove(self, o): return self._changed(super().remove(o))
+    def pop(self, o=-1): return self._changed(super().pop(o))
+    def clear(self): return self._changed(super().clear())
+    def reverse(self): return self._changed(super().reverse())
+    def sort(self, key=None, reverse=False): return self._changed(super().sort(key=key, reverse=reverse))
+    def __setitem__(self, idx, o): return self._changed(super().__setitem__(idx, o))
+    def __delitem__(self, i): return self._changed(super().__delitem__(i))
+
 #Cell
 class Learner():
     def __init__(self, dbunch, model, loss_func=None, opt_func=Adam, lr=defaults.lr, splitter=trainable_params, cbs=None,
@@ -188,6 +208,10 @@ class Learner():
     def metrics(self): return self._metrics
     @metrics.setter
     def metrics(self,v): self._metrics = L(v).map(mk_metric)
+    @property
+    def cbs(self): return self._cbs
+    @cbs.setter
+    def cbs(self,v): self._cbs,self._cb_tbl = _CbList(v, self),None
 
     def add_cbs(self, cbs): L(cbs).map(self.add_cb)
     def remove_cbs(self, cbs): L(cbs).map(self.remove_cb)
@@ -215,7 +239,16 @@ class Learner():
     def __call__(self, event_name): L(event_name).map(self._call_one)
     def _call_one(self, event_name):
         assert hasattr(event, event_name)
-        [cb(event_name) for cb in sort_by_run(self.cbs)]
+        if self._cb_tbl is None: self._cb_tbl = self._build_cb_tbl()
+        for cb,f in self._cb_tbl[event_name]:
+            if cb is None or cb.run: f()
+
+    def _build_cb_tbl(self):
+        "Ordered `(cb,f)` pairs of the callbacks implementing each event, with `cb=None` when `f` checks `cb.run` itself"
+        cbs = sort_by_run(self.cbs)
+        # Callbacks overriding `__call__` are called on all events, and decide what to do when `run` is False
+        return {e:[(None if _overrides_call(cb) else cb,f) for cb,f in ((cb,_cb_func(cb,e)) for cb in cbs) if f is not None]
+                for e in _events}
 
     def _bn_bias_state(self, with_bias): return bn_bias_params(self.model, with_bias).map(self.opt.state)
     def create_opt(self):
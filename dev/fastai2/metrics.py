@@ -13,9 +13,6 @@ from .data.all import *
 from .optimizer import *
 from .learner import *
 
-#Cell
-import sklearn.metrics as skm
-
 #Cell
 class AccumMetric(Metric):
     "Stores predictions and targets on CPU in accumulate to perform final calculations with `func`."
@@ -1,7 +1,8 @@
 #AUTOGENERATED! DO NOT EDIT! File to edit: dev/00_test.ipynb (unless otherwise specified).
 
 __all__ = ['test_fail', 'test', 'nequals', 'test_eq', 'test_eq_type', 'test_ne', 'is_close', 'test_close', 'test_is',
-           'test_shuffled', 'test_stdout', 'test_warns', 'TEST_IMAGE', 'TEST_IMAGE_BW', 'test_fig_exists']
+           'test_shuffled', 'test_stdout', 'test_warns', 'TEST_IMAGE', 'TEST_IMAGE_BW', 'test_fig_exists',
+           'import_time']
 
 #Cell
 from .core.imports import *
@@ -93,4 +94,12 @@ TEST_IMAGE_BW = 'images/mnist3.png'
 #Cell
 def test_fig_exists(ax):
     "Test there is a figure displayed in `ax`"
-    assert ax and len(np.frombuffer(ax.figure.canvas.tostring_argb(), dtype=np.uint8))
\ No newline at end of file
+    assert ax and len(np.frombuffer(ax.figure.canvas.tostring_argb(), dtype=np.uint8))
+
+#Cell
+def import_time(mod):
+    "Import `mod` in a fresh interpreter and return the time it took (in seconds) and the names of all modules loaded"
+    res = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {mod}'], stderr=subprocess.PIPE, universal_newlines=True)
+    if res.returncode: raise ImportError(res.stderr.splitlines()[-1])
+    lines = [l.split('|') for l in res.stderr.splitlines() if l.startswith('import time:') and '[us]' not in l]
+    return int(lines[-1][1])/1e6, {l[2].strip() for l in lines}
\ No newline at end of file
@@ -13,8 +13,7 @@ from ..core import *
 from ..data.all import *
 
 #Cell
-import spacy,html
-from spacy.symbols import ORTH
+import html
 
 #Cell
 #special tokens
@@ -113,7 +112,7 @@ class SpacyTokenizer():
     def __init__(self, lang='en', special_toks=None, buf_sz=5000):
         special_toks = ifnone(special_toks, defaults.text_spec_tok)
         nlp = spacy.blank(lang, disable=["parser", "tagger", "ner"])
-        for w in special_toks: nlp.tokenizer.add_special_case(w, [{ORTH: w}])
+        for w in special_toks: nlp.tokenizer.add_special_case(w, [{spacy.symbols.ORTH: w}])
         self.pipe,self.buf_sz = nlp.pipe,buf_sz
 
     def __call__(self, items):
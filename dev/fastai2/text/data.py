@@ -39,6 +39,9 @@ class Numericalize(Transform):
             self.o2i = defaultdict(int, {v:k for k,v in enumerate(self.vocab) if v != 'xxfake'})
 
     def encodes(self, o): return TensorText(tensor([self.o2i  [o_] for o_ in o]))
+    def encodes_batch(self, os):
+        ids = tensor([self.o2i[o_] for o in os for o_ in o]).split([len(o) for o in os])
+        return [TensorText(o.clone()) for o in ids]
     def decodes(self, o): return Str(self.sep.join([self.vocab[o_] for o_ in o if self.vocab[o_] != PAD]))
 
 #Cell
@@ -60,10 +63,26 @@ class LMDataLoader(TfmdDL):
 
     def make_chunks(self): self.chunks = Chunks(self.items, self.lens)
     def shuffle_fn(self,idxs):
-        self.items.shuffle()
+        self.rng.shuffle(self.items.idxs)
         self.make_chunks()
         return idxs
 
+    def _reindex(self, idxs):
+        self.items.reindex(L(idxs))
+        self.lens.reindex(self.items.idxs)
+        self.make_chunks()
+
+    def _epoch_state(self): return {**super()._epoch_state(), 'items_idxs': self.items.idxs}
+    def _set_epoch_state(self, state):
+        state = state.copy()
+        self._reindex(state.pop('items_idxs'))
+        super()._set_epoch_state(state)
+
+    def state_dict(self): return {**super().state_dict(), 'items_idxs': list(self.items.idxs)}
+    def load_state_dict(self, sd):
+        super().load_state_dict(sd)
+        self._reindex(sd['items_idxs'])
+
     def create_item(self, seq):
         if seq>=self.n: raise IndexError
         st = ((seq%self.bs)*self.spb + (seq//self.bs)) * self.seq_len
@@ -101,34 +120,120 @@ def pad_input(samples, pad_idx=1, pad_fields=0, pad_first=False, backwards=False
 
 #Cell
 def _default_sort(x): return len(x[0])
+def _sort_vals(ds, tfm, sort_func, idxs): return [sort_func(tfm(ds[i])) for i in idxs]
+def _item_lens(len_func, items): return [len_func(o) for o in items]
+def _fingerprint(items): return hashlib.md5(pickle.dumps(items, pickle.HIGHEST_PROTOCOL)).hexdigest()
 
 @delegates(TfmdDL)
 class SortedDL(TfmdDL):
-    def __init__(self, dataset, sort_func=None, res=None, **kwargs):
+    def __init__(self, dataset, sort_func=None, res=None, len_func=None, n_workers=0, res_path=None, max_tokens=None, **kwargs):
         super().__init__(dataset, **kwargs)
         self.sort_func = _default_sort if sort_func is None else sort_func
-        self.res = [self.sort_func(self.do_item(i)) for i in range_of(self.dataset)] if res is None else res
-        self.idx_max = np.argmax(self.res)
+        store_attr(self, 'len_func,n_workers,res_path,max_tokens')
+        self._res,self._batches = None if res is None else np.array(res),None
+
+    @property
+    def res(self):
+        if self._res is None: self._res = self._get_res()
+        return self._res
+
+    @property
+    def idx_max(self): return np.argmax(self.res)
+    @property
+    def packs_batches(self): return self.max_tokens is not None
+
+    def _get_res(self):
+        items = getattr(self.dataset, 'items', self.dataset)
+        p = None if self.res_path is None else Path(self.res_path)
+        # The cache at `res_path` stores the lengths by split, with the fingerprint of the raw items they come from
+        cache,split = {},getattr(self.dataset, 'split_idx', None)
+        if p is not None and p.exists():
+            with open(p, 'rb') as f: cache = pickle.load(f)
+        key = None if p is None else _fingerprint(items)
+        if key is not None and split in cache and cache[split][0]==key: return cache[split][1]
+        # Workers only get what computes the lengths and their chunk, not the whole `DataLoader`
+        chunks = np.array_split(np.arange(len(self.dataset)), max(self.n_workers,1))
+        if self.len_func is None: f = partial(_sort_vals, self.dataset, self.after_item, self.sort_func)
+        else:
+            if isinstance(items, pd.DataFrame): items = [o for _,o in items.iterrows()]
+            f,chunks = partial(_item_lens, self.len_func),[[items[i] for i in c] for c in chunks]
+        res = np.array(parallel(f, chunks, n_workers=self.n_workers, progress=False).concat())
+        if key is not None:
+            cache[split] = key,res
+            tmp = p.parent/f'{p.name}.{os.getpid()}.tmp'
+            with open(tmp, 'wb') as f: pickle.dump(cache, f)
+            os.replace(tmp, p)
+        return res
 
     def get_idxs(self):
+        if self.max_tokens is not None: return self._get_batches()
         idxs = super().get_idxs()
         if self.shuffle: return idxs
-        return sorted(idxs, key=lambda i: self.res[i], reverse=True)
+        idxs = np.array(list(idxs), dtype=np.int64)
+        return idxs[np.argsort(-self.res[idxs], kind='stable')].tolist()
+
+    def _chunk_sort(self, rng, sz):
+        "Random permutation with the longest item first, sorted by decreasing length inside chunks of `sz`"
+        idxs = rng.permutation(len(self.dataset))
+        i_max = np.nonzero(idxs==self.idx_max)[0][0]
+        idxs[0],idxs[i_max] = idxs[i_max],idxs[0]
+        return idxs[np.lexsort((-self.res[idxs], np.arange(len(idxs))//sz))]
 
     def shuffle_fn(self,idxs):
-        idxs = np.random.permutation(len(self.dataset))
-        idx_max = np.extract(idxs==self.idx_max, idxs)[0]
-        idxs[0],idxs[idx_max] = idxs[idx_max],idxs[0]
-        sz = self.bs*50
-        chunks = [idxs[i:i+sz] for i in range(0, len(idxs), sz)]
-        chunks = [sorted(s, key=lambda i: self.res[i], reverse=True) for s in chunks]
-        sort_idx = np.concatenate(chunks)
-
-        sz = self.bs
-        batches = [sort_idx[i:i+sz] for i in range(0, len(sort_idx), sz)]
-        sort_idx = np.concatenate(np.random.permutation(batches[1:-1])) if len(batches) > 2 else np.array([],dtype=np.int)
-        sort_idx = np.concatenate((batches[0], sort_idx) if len(batches)==1 else (batches[0], sort_idx, batches[-1]))
-        return iter(sort_idx)
+        rng = np.random.RandomState(self.rng.randint(0,2**32-1))
+        # Sort by decreasing length inside chunks of 50 batches, then shuffle all full batches but the first one
+        sort_idx = self._chunk_sort(rng, self.bs*50)
+        n_mid = len(sort_idx)//self.bs - 1 - (len(sort_idx)%self.bs==0)
+        if n_mid<=0: return iter(sort_idx)
+        mid = sort_idx[self.bs:self.bs*(n_mid+1)].reshape(n_mid, self.bs)[rng.permutation(n_mid)].reshape(-1)
+        return iter(np.concatenate([sort_idx[:self.bs], mid, sort_idx[self.bs*(n_mid+1):]]))
+
+    def _bs_max(self, l): return min(self.bs, max(1, self.max_tokens//max(int(l),1)))
+
+    def _pack(self, sort_idx, sz):
+        "Split `sort_idx` (sorted by decreasing length inside chunks of `sz`) in batches within `bs` items and `max_tokens` padded tokens"
+        lens,res,i = self.res[sort_idx],[],0
+        while i<len(sort_idx):
+            n = min(self._bs_max(lens[i]), (i//sz+1)*sz-i)
+            res.append(sort_idx[i:i+n].tolist())
+            i += n
+        if self.drop_last and res and len(res[-1])<self._bs_max(self.res[res[-1][0]]): res = res[:-1]
+        return res
+
+    def _get_batches(self):
+        "Batches of indices of the epoch, packed by number of tokens, cached for the current state of `rng`"
+        key = self.rng.getstate() if self.shuffle else None
+        if self._batches is not None and self._batches[0]==key: return self._batches[1]
+        if not self.shuffle: res = self._pack(np.argsort(-self.res, kind='stable'), len(self.res))
+        else:
+            rng = np.random.RandomState(copy(self.rng).randint(0,2**32-1))
+            sz = 50*self._bs_max(np.median(self.res))
+            res = self._pack(self._chunk_sort(rng, sz), sz)
+            if len(res)>2: res = res[:1] + [res[i+1] for i in rng.permutation(len(res)-2)] + res[-1:]
+        self._batches = (key,res)
+        return res
+
+    def sample(self):
+        if self.max_tokens is None: return super().sample()
+        idxs = self.get_idxs() if self._idxs is None else self._idxs[self._n_skip:]
+        return (b for i,b in enumerate(idxs) if i%self.nw==self.offs)
+
+    def create_batches(self, samps):
+        # No `super()` here: `DataLoader.new` and `DistributedDL.from_dl` bind this method to other loaders
+        if getattr(self, 'max_tokens', None) is None: yield from DataLoader.create_batches(self, samps); return
+        self.it = None
+        for idxs in samps:
+            b = self._do_items(idxs) if self._batch_items() else [o for o in map(self.do_item, idxs) if o is not None]
+            if b: yield self.do_batch(b)
+
+    def __len__(self):
+        if self.max_tokens is None: return super().__len__()
+        if self._idxs is not None: return len(self._idxs)
+        # Batches of the next epoch: `__iter__` starts by randomizing `rng`
+        rng = self.rng
+        self.rng = random.Random(copy(rng).randint(0,2**32-1))
+        try: return len(self.get_idxs())
+        finally: self.rng = rng
 
 #Cell
 def TextBlock(vocab=None, is_lm=False):
@@ -139,11 +244,12 @@ def TextBlock(vocab=None, is_lm=False):
 class TextDataBunch(DataBunch):
     @classmethod
     @delegates(DataBunch.from_dblock)
-    def from_folder(cls, path, train='train', valid='valid', valid_pct=None, seed=None, vocab=None, text_vocab=None, is_lm=False, **kwargs):
+    def from_folder(cls, path, train='train', valid='valid', valid_pct=None, seed=None, vocab=None, text_vocab=None, is_lm=False,
+                    manifest=None, **kwargs):
         "Create from imagenet style dataset in `path` with `train`,`valid`,`test` subfolders (or provide `valid_pct`)."
         splitter = GrandparentSplitter(train_name=train, valid_name=valid) if valid_pct is None else RandomSplitter(valid_pct, seed=seed)
         dblock = DataBlock(blocks=(TextBlock(text_vocab, is_lm), CategoryBlock(vocab=vocab)),
-                           get_items=get_text_files,
+                           get_items=partial(get_text_files, manifest=manifest),
                            splitter=splitter,
                            get_x=read_file,
                            get_y=parent_label)
@@ -171,15 +171,19 @@ def _patch_tb():
     TensorBase._patched = True
 
     def get_f(fn):
+        f = getattr(Tensor, fn)
         def _f(self, *args, **kwargs):
-            cls = self.__class__
-            res = getattr(super(TensorBase, self), fn)(*args, **kwargs)
-            return cls(res) if isinstance(res,Tensor) else res
+            res = f(self, *args, **kwargs)
+            # Retag the result in place instead of wrapping it in a new subclass tensor, with a copy of `_meta`
+            if isinstance(res,Tensor) and res.__class__ is not self.__class__:
+                res.__class__ = self.__class__
+                res._meta = dict(getattr(self, '_meta', {}))
+            return res
         return _f
 
     t = tensor([1])
     skips = '__getitem__ __class__ __deepcopy__ __delattr__ __dir__ __doc__ __getattribute__ __hash__ __init__ \
-        __init_subclass__ __new__ __reduce__ __reduce_ex__ __module__ __setstate__'.split()
+        __init_subclass__ __new__ __reduce__ __reduce_ex__ __module__ __setattr__ __setstate__'.split()
 
     for fn in dir(t):
         if fn in skips: continue
@@ -1,5 +1,6 @@
 from ..data.core import *
 from .augment import *
+from .rect_augment import *
 from .core import *
 from .data import *
 from .models.all import *
@@ -19,14 +19,15 @@ from torch.distributions.bernoulli import Bernoulli
 #Cell
 class RandTransform(Transform):
     "A transform that before_call its state at each `__call__`, only applied on the training set"
-    split_idx,do,nm,supports = 0,True,None,[]
+    # Draws from `rng`, which thread workers of `DataLoader` replace by a generator seeded for each of them
+    split_idx,do,nm,supports,rng = 0,True,None,[],random
     def __init__(self, p=1., nm=None, before_call=None, **kwargs):
         super().__init__(**kwargs)
         self.p,self.before_call = p,ifnone(before_call,self.before_call)
 
     def before_call(self, b, split_idx):
         "before_call the state for input `b`"
-        self.do = random.random() < self.p
+        self.do = self.rng.random() < self.p
 
     def __call__(self, b, split_idx=None, **kwargs):
         self.before_call(b, split_idx=split_idx)
@@ -83,7 +84,7 @@ class DihedralItem(RandTransform):
 
     def before_call(self, b, split_idx):
         super().before_call(b, split_idx)
-        self.k = random.randint(0,7)
+        self.k = self.rng.randint(0,7)
 
     def encodes(self, x:(Image.Image,*TensorTypes)): return x.dihedral(self.k)
 
@@ -156,7 +157,7 @@ class RandomCrop(CropPad):
     def before_call(self, b, split_idx):
         super().before_call(b, split_idx)
         w,h = self.orig_sz
-        if not split_idx: self.tl = (random.randint(0,w-self.cp_size[0]), random.randint(0,h-self.cp_size[1]))
+        if not split_idx: self.tl = (self.rng.randint(0,w-self.cp_size[0]), self.rng.randint(0,h-self.cp_size[1]))
 
 #Cell
 mk_class('ResizeMethod', **{o:o.lower() for o in ['Squish', 'Crop', 'Pad']},
@@ -171,6 +172,11 @@ class Resize(CropPad):
         super().__init__(size, pad_mode=pad_mode, **kwargs)
         (self.mode,self.mode_mask),self.method = resamples,method
 
+    @property
+    def draft_size(self):
+        "Smallest size (height, width) images can be decoded at without losing resolution"
+        return (self.size[1],self.size[0])
+
     def before_call(self, b, split_idx):
         super().before_call(b, split_idx)
         self.final_size = self.size
@@ -182,7 +188,7 @@ class Resize(CropPad):
         m = w/self.final_size[0] if op(w/self.final_size[0],h/self.final_size[1]) else h/self.final_size[1]
         self.cp_size = (int(m*self.final_size[0]),int(m*self.final_size[1]))
         if self.method==ResizeMethod.Pad or split_idx: self.tl = ((w-self.cp_size[0])//2, (h-self.cp_size[1])//2)
-        else: self.tl = (random.randint(0,w-self.cp_size[0]), random.randint(0,h-self.cp_size[1]))
+        else: self.tl = (self.rng.randint(0,w-self.cp_size[0]), self.rng.randint(0,h-self.cp_size[1]))
 
 #Cell
 class RandomResizedCrop(CropPad):
@@ -192,6 +198,11 @@ class RandomResizedCrop(CropPad):
         store_attr(self, 'min_scale,ratio,val_xtra_size')
         self.mode,self.mode_mask = resamples
 
+    @property
+    def draft_size(self):
+        "Smallest size (height, width) images can be decoded at without losing resolution, even in the smallest crops"
+        return tuple(max(math.ceil(s/math.sqrt(self.min_scale)), s+self.val_xtra_size) for s in (self.size[1],self.size[0]))
+
     def before_call(self, b, split_idx):
         super().before_call(b, split_idx)
         if split_idx:
@@ -201,13 +212,13 @@ class RandomResizedCrop(CropPad):
         self.final_size = self.size
         w,h = self.orig_sz
         for attempt in range(10):
-            area = random.uniform(self.min_scale,1.) * w * h
-            ratio = math.exp(random.uniform(math.log(self.ratio[0]), math.log(self.ratio[1])))
+            area = self.rng.uniform(self.min_scale,1.) * w * h
+            ratio = math.exp(self.rng.uniform(math.log(self.ratio[0]), math.log(self.ratio[1])))
             nw = int(round(math.sqrt(area * ratio)))
             nh = int(round(math.sqrt(area / ratio)))
             if nw <= w and nh <= h:
                 self.cp_size = (nw,nh)
-                self.tl = random.randint(0,w-nw), random.randint(0,h - nh)
+                self.tl = self.rng.randint(0,w-nw), self.rng.randint(0,h - nh)
                 return
         if   w/h < self.ratio[0]: self.cp_size = (w, int(w/self.ratio[0]))
         elif w/h > self.ratio[1]: self.cp_size = (int(h*self.ratio[1]), h)
@@ -291,7 +302,7 @@ def _prepare_mat(x, mat):
 #Cell
 class AffineCoordTfm(RandTransform):
     "Combine and apply affine and coord transforms"
-    split_idx,order = None,30
+    split_idx,order,cur_split = None,30,None
     def __init__(self, aff_fs=None, coord_fs=None, size=None, mode='bilinear', pad_mode=PadMode.Reflection, mode_mask='nearest'):
         self.aff_fs,self.coord_fs = L(aff_fs),L(coord_fs)
         store_attr(self, 'size,mode,pad_mode,mode_mask')
@@ -299,7 +310,7 @@ class AffineCoordTfm(RandTransform):
 
     def before_call(self, b, split_idx):
         if isinstance(b, tuple): b = b[0]
-        self.split_idx = split_idx
+        self.cur_split = split_idx
         self.do,self.mat = True,self._get_affine_mat(b)
         for t in self.coord_fs: t.before_call(b)
 
@@ -310,19 +321,20 @@ class AffineCoordTfm(RandTransform):
 
     def _get_affine_mat(self, x):
         aff_m = _init_mat(x)
-        if self.split_idx: return _prepare_mat(x, aff_m)
+        if self.cur_split: return _prepare_mat(x, aff_m)
         ms = [f(x) for f in self.aff_fs]
         ms = [m for m in ms if m is not None]
         for m in ms: aff_m = aff_m @ m
         return _prepare_mat(x, aff_m)
 
     def _encode(self, x, mode, reverse=False):
-        coord_func = None if len(self.coord_fs)==0 or self.split_idx else partial(compose_tfms, tfms=self.coord_fs, reverse=reverse)
+        coord_func = None if len(self.coord_fs)==0 or self.cur_split else partial(compose_tfms, tfms=self.coord_fs, reverse=reverse)
         return x.affine_coord(self.mat, coord_func, sz=self.size, mode=mode, pad_mode=self.pad_mode)
 
     def encodes(self, x:TensorImage): return self._encode(x, self.mode)
     def encodes(self, x:TensorMask):  return self._encode(x, self.mode_mask)
     def encodes(self, x:(TensorPoint, TensorBBox)): return self._encode(x, self.mode, reverse=True)
+    def fuse(self, t): return _FusedAugTfm([self]).fuse(t)
 
 #Cell
 class RandomResizedCropGPU(RandTransform):
@@ -338,13 +350,13 @@ class RandomResizedCropGPU(RandTransform):
         h,w = Tuple((b[0] if isinstance(b, tuple) else b).shape[-2:])
         for attempt in range(10):
             if split_idx: break
-            area = random.uniform(self.min_scale,1.) * w * h
-            ratio = math.exp(random.uniform(math.log(self.ratio[0]), math.log(self.ratio[1])))
+            area = self.rng.uniform(self.min_scale,1.) * w * h
+            ratio = math.exp(self.rng.uniform(math.log(self.ratio[0]), math.log(self.ratio[1])))
             nw = int(round(math.sqrt(area * ratio)))
             nh = int(round(math.sqrt(area / ratio)))
             if nw <= w and nh <= h:
                 self.cp_size = (nh,nw)
-                self.tl = random.randint(0,h - nh),random.randint(0,w-nw)
+                self.tl = self.rng.randint(0,h - nh),self.rng.randint(0,w-nw)
                 return
         if   w/h < self.ratio[0]: self.cp_size = (int(w/self.ratio[0]), w)
         elif w/h > self.ratio[1]: self.cp_size = (h, int(h*self.ratio[1]))
@@ -356,6 +368,8 @@ class RandomResizedCropGPU(RandTransform):
         x = x[...,self.tl[0]:self.tl[0]+self.cp_size[0], self.tl[1]:self.tl[1]+self.cp_size[1]]
         return TensorImage(x).affine_coord(sz=self.size, mode=self.mode)
 
+    def fuse(self, t): return _FusedAugTfm([self]).fuse(t)
+
 #Cell
 def affine_mat(*ms):
     "Restructure length-6 vector `ms` into an affine matrix with 0,0,1 in the last line"
@@ -646,6 +660,113 @@ def Contrast(max_lighting=0.2, p=0.75, draw=None, batch=False):
     "Apply change in contrast of `max_lighting` to batch of images with probability `p`."
     return LightingTfm(_ContrastLogit(max_lighting, p, draw, batch))
 
+#Cell
+def _fake_batch(x, sz):
+    "A batch with the shape of `x` for images of size `sz`, without allocating it"
+    return TensorImage(x.new_zeros(()).expand(*x.shape[:2], *sz))
+
+def _out_size(t, sz):
+    if isinstance(t, RandomResizedCropGPU): return tuple(t.size)
+    return sz if t.cp_size is None else t.cp_size
+
+def _scale_shift_(coords, sx, sy, tx, ty):
+    "Scale and shift `coords` in place, one component at a time (faster than broadcasting on the last dim)"
+    coords[...,0].mul_(sx).add_(tx)
+    coords[...,1].mul_(sy).add_(ty)
+    return coords
+
+def _crop_mat(t, sz):
+    "Scale and shift mapping the coordinates in the crop of `t` to its input, of size `sz`"
+    (h,w),(ch,cw),(top,left) = sz,t.cp_size,t.tl
+    dw,dh = max(w-1,1),max(h-1,1)
+    return ((cw-1)/dw, (ch-1)/dh),((2*left+cw-1)/dw-1, (2*top+ch-1)/dh-1)
+
+def _fused_coords(x, stages, size):
+    "Coordinates in `x` sampled by `stages` (pairs of geometric transform and input size) for an output of `size`"
+    mat,coords = _init_mat(x),None
+    for t,sz in reversed(stages):
+        if isinstance(t, RandomResizedCropGPU):
+            (sx,sy),(tx,ty) = _crop_mat(t, sz)
+            if coords is None: mat = x.new_tensor([[sx,0,tx],[0,sy,ty],[0,0,1]]) @ mat
+            else: _scale_shift_(coords, sx, sy, tx, ty)
+            continue
+        m = torch.cat([t.mat, mat[:,2:]], dim=1)
+        if coords is None: mat = m @ mat
+        else: coords = (coords.view(coords.size(0),-1,2) @ m[:,:2,:2].transpose(1,2) + m[:,:2,2].unsqueeze(1)).view(*coords.shape)
+        if len(t.coord_fs)==0 or t.cur_split: continue
+        if coords is None: coords = F.affine_grid(mat[:,:2], x.shape[:2]+size)
+        coords = compose_tfms(coords, tfms=t.coord_fs)
+    return F.affine_grid(mat[:,:2], x.shape[:2]+size) if coords is None else coords
+
+def _px_range(mn, mx, n):
+    "Range of the pixels (out of `n`) needed to interpolate between normalized coordinates `mn` and `mx`"
+    return max(0, math.floor((mn+1)*(n-1)/2)),min(n-1, math.ceil((mx+1)*(n-1)/2))
+
+def _sample(x, coords, mode='bilinear', pad_mode=PadMode.Reflection):
+    "Sample `x` at `coords` with `_grid_sample`, only keeping the area of `x` sampled when it may be downsampled first"
+    h,w = x.shape[-2:]
+    if mode=='bilinear' and min(h/coords.shape[-3], w/coords.shape[-2])>2:
+        c = coords.view(-1, 2)
+        (mnx,mny),(mxx,mxy) = c.min(0)[0].tolist(),c.max(0)[0].tolist()
+        (x0,x1),(y0,y1) = _px_range(mnx, mxx, w),_px_range(mny, mxy, h)
+        if (x1-x0+1,y1-y0+1)!=(w,h):
+            x,dw,dh = x[...,y0:y1+1,x0:x1+1],max(x1-x0,1),max(y1-y0,1)
+            _scale_shift_(coords, (w-1)/dw, (h-1)/dh, (w-1-2*x0)/dw-1, (h-1-2*y0)/dh-1)
+    return _grid_sample(x, coords, mode=mode, padding_mode=pad_mode)
+
+def _lighting_(x, fs):
+    "Apply `fs` to the logits of `x`, in place"
+    x = compose_tfms(x.clamp_(1e-7, 1-1e-7).reciprocal_().sub_(1).log_().neg_(), tfms=fs)
+    return x.sigmoid_()
+
+#Cell
+class _FusedAugTfm(RandTransform):
+    "An `AffineCoordTfm` or `RandomResizedCropGPU` then `RandomResizedCropGPU`s `tfms`, maybe followed by a `LightingTfm`, applied to images in one pass"
+    split_idx,order = None,30
+    def __init__(self, tfms):
+        super().__init__()
+        self.tfms = L(tfms)
+
+    @property
+    def use_as_item(self): return self.tfms[0].use_as_item
+    @property
+    def geo_tfms(self): return self.tfms.filter(lambda t: not isinstance(t, LightingTfm))
+    @property
+    def mode(self): return self.geo_tfms[0].mode
+    @property
+    def pad_mode(self): return next((t.pad_mode for t in self.geo_tfms if isinstance(t, AffineCoordTfm)), PadMode.Reflection)
+
+    def fuse(self, t):
+        "`_FusedAugTfm` also applying `t` if it can be part of the same pass"
+        # An `AffineCoordTfm` pads the images it gets where it samples outside of them, which can't be done from the original
+        # images when a geometric transform comes first, so only crops (that stay inside their input) can follow one
+        if isinstance(self.tfms[-1], LightingTfm) or type(t) not in (RandomResizedCropGPU,LightingTfm): return None
+        if type(t) is RandomResizedCropGPU and t.mode!=self.mode: return None
+        return _FusedAugTfm(self.tfms+[t])
+
+    def before_call(self, b, split_idx):
+        self.do = True
+        x = b[0] if isinstance(b, tuple) else b
+        self.sizes,sz = [],tuple(x.shape[-2:])
+        for t in self.tfms:
+            self.sizes.append(sz)
+            t.before_call(_fake_batch(x, sz), split_idx)
+            if t.do and not isinstance(t, LightingTfm): sz = _out_size(t, sz)
+        self.size = sz
+
+    def encodes(self, x:TensorImage):
+        geo = [(t,sz) for t,sz in zip(self.tfms,self.sizes) if t.do and not isinstance(t, LightingTfm)]
+        if len(geo)>0:
+            x = TensorImage(_sample(x, _fused_coords(x, geo, self.size), mode=self.mode, pad_mode=self.pad_mode))
+        lig = self.tfms[-1]
+        if not isinstance(lig, LightingTfm) or not lig.do: return x
+        return TensorImage(_lighting_(x, lig.fs)) if len(geo)>0 else lig.encodes(x)
+
+    def encodes(self, x:(TensorMask,TensorPoint,TensorBBox)):
+        for t in self.tfms:
+            if t.do: x = t.encodes(x)
+        return x
+
 #Cell
 def _compose_same_tfms(tfms):
     tfms = L(tfms)
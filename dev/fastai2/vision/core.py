@@ -53,24 +53,31 @@ def resize_max(x: Image.Image, resample=0, max_px=None, max_h=None, max_w=None):
     return x.reshape(round(h), round(w), resample=resample)
 
 #Cell
-def load_image(fn, mode=None, **kwargs):
-    "Open and load a `PIL.Image` and convert to `mode`"
+def load_image(fn, mode=None, size=None, **kwargs):
+    "Open and load a `PIL.Image` and convert to `mode`, decoding JPEGs at the smallest scale still bigger than `size`"
     im = Image.open(fn, **kwargs)
+    if size is not None:
+        h,w = (size,size) if isinstance(size,int) else size
+        im.draft(mode, (w,h))
     im.load()
     im = im._new(im.im)
     return im.convert(mode) if mode else im
 
 #Cell
+defaults.image_cache = None
+
 class PILBase(Image.Image, metaclass=BypassNewMeta):
     _bypass_type=Image.Image
     _show_args = {'cmap':'viridis'}
     _open_args = {'mode': 'RGB'}
     @classmethod
-    def create(cls, fn, **kwargs)->None:
-        "Open an `Image` from path `fn`"
+    def create(cls, fn, size=None, cache=None, **kwargs)->None:
+        "Open an `Image` from path `fn`, from the smallest version in `cache` and at a reduced scale that still cover `size` if passed"
         if isinstance(fn,Tensor): fn = fn.numpy()
         if isinstance(fn,ndarray): return cls(Image.fromarray(fn))
-        return cls(load_image(fn, **merge(cls._open_args, kwargs)))
+        cache = ifnone(cache, defaults.image_cache)
+        if size is not None and cache is not None: fn = cache.lookup(fn, size)
+        return cls(load_image(fn, size=size, **merge(cls._open_args, kwargs)))
 
     def show(self, ctx=None, **kwargs):
         "Show image using `merge(self._show_args, kwargs)`"
@@ -126,8 +133,6 @@ def get_annotations(fname, prefix=None):
     return [id2images[k] for k in ids], [(id2bboxes[k], id2cats[k]) for k in ids]
 
 #Cell
-from matplotlib import patches, patheffects
-
 def _draw_outline(o, lw):
     o.set_path_effects([patheffects.Stroke(linewidth=lw, foreground='black'), patheffects.Normal()])
 
@@ -10,25 +10,33 @@ from ..data.all import *
 
 from .core import *
 
+#Cell
+def _draft_size(item_tfms=None, dl_type=None, **kwargs):
+    "Size JPEGs can be decoded at, if `dl_type` or the first of `item_tfms` changing the size of the images resizes them"
+    if hasattr(dl_type, 'draft_size'): return dl_type.draft_size(**kwargs)
+    for t in sorted([t for t in L(item_tfms) if not isinstance(t,type)], key=attrgetter('order')):
+        if hasattr(t, 'draft_size'): return t.draft_size
+        if hasattr(t, 'size'): return None
+
 #Cell
 class ImageDataBunch(DataBunch):
 
     @classmethod
     @delegates(DataBunch.from_dblock)
-    def from_folder(cls, path, train='train', valid='valid', valid_pct=None, seed=None, vocab=None, **kwargs):
+    def from_folder(cls, path, train='train', valid='valid', valid_pct=None, seed=None, vocab=None, manifest=None, cache=None, **kwargs):
         "Create from imagenet style dataset in `path` with `train`,`valid`,`test` subfolders (or provide `valid_pct`)."
         splitter = GrandparentSplitter(train_name=train, valid_name=valid) if valid_pct is None else RandomSplitter(valid_pct, seed=seed)
-        dblock = DataBlock(blocks=(ImageBlock, CategoryBlock(vocab=vocab)),
-                           get_items=get_image_files,
+        dblock = DataBlock(blocks=(ImageBlock(size=_draft_size(**kwargs), cache=cache), CategoryBlock(vocab=vocab)),
+                           get_items=partial(get_image_files, manifest=manifest),
                            splitter=splitter,
                            get_y=parent_label)
         return cls.from_dblock(dblock, path, path=path, **kwargs)
 
     @classmethod
     @delegates(DataBunch.from_dblock)
-    def from_name_func(cls, path, fnames, label_func, valid_pct=0.2, seed=None, **kwargs):
+    def from_name_func(cls, path, fnames, label_func, valid_pct=0.2, seed=None, cache=None, **kwargs):
         "Create from list of `fnames` in `path`s with `label_func`."
-        dblock = DataBlock(blocks=(ImageBlock, CategoryBlock),
+        dblock = DataBlock(blocks=(ImageBlock(size=_draft_size(**kwargs), cache=cache), CategoryBlock),
                            splitter=RandomSplitter(valid_pct, seed=seed),
                            get_y=label_func)
         return cls.from_dblock(dblock, fnames, path=path, **kwargs)
@@ -41,10 +49,10 @@ class ImageDataBunch(DataBunch):
 
     @classmethod
     @delegates(DataBunch.from_dblock)
-    def from_df(cls, df, path='.', valid_pct=0.2, seed=None, fn_col=0, folder=None, suff='', label_col=1, label_delim=None, y_block=None, **kwargs):
+    def from_df(cls, df, path='.', valid_pct=0.2, seed=None, fn_col=0, folder=None, suff='', label_col=1, label_delim=None, y_block=None, cache=None, **kwargs):
         pref = f'{Path(path) if folder is None else Path(path)/folder}{os.path.sep}'
         if y_block is None: y_block = MultiCategoryBlock if is_listy(label_col) and len(label_col) > 1 else CategoryBlock
-        dblock = DataBlock(blocks=(ImageBlock, y_block),
+        dblock = DataBlock(blocks=(ImageBlock(size=_draft_size(**kwargs), cache=cache), y_block),
                            get_x=ColReader(fn_col, pref=pref, suff=suff),
                            get_y=ColReader(label_col, label_delim=label_delim),
                            splitter=RandomSplitter(valid_pct, seed=seed))
@@ -57,11 +65,11 @@ class ImageDataBunch(DataBunch):
 
     @classmethod
     @delegates(DataBunch.from_dblock)
-    def from_lists(cls, path, fnames, labels, valid_pct=0.2, seed:int=None, y_block=None, **kwargs):
+    def from_lists(cls, path, fnames, labels, valid_pct=0.2, seed:int=None, y_block=None, cache=None, **kwargs):
         "Create from list of `fnames` in `path`."
         if y_block is None:
             y_block = MultiCategoryBlock if is_listy(labels[0]) and len(labels[0]) > 1 else (TransformBlock if isinstance(labels[0], float) else CategoryBlock)
-        dblock = DataBlock(blocks=(ImageBlock, y_block),
+        dblock = DataBlock(blocks=(ImageBlock(size=_draft_size(**kwargs), cache=cache), y_block),
                            splitter=RandomSplitter(valid_pct, seed=seed))
         return cls.from_dblock(dblock, (fnames, labels), path=path, **kwargs)
 
@@ -114,7 +122,18 @@ def bb_pad(samples, pad_idx=0):
     return [_f(*s) for s in samples]
 
 #Cell
-def ImageBlock(cls=PILImage): return TransformBlock(type_tfms=cls.create, batch_tfms=IntToFloatTensor)
+class _CheckByteImage(Transform):
+    "Check item transforms kept images as byte tensors, so they are collated and sent by the workers as `uint8`"
+    order = 100
+    def encodes(self, o:TensorImage):
+        assert o.dtype==torch.uint8, f"Images should stay byte tensors until `IntToFloatTensor`, got {o.dtype}"
+        return o
+
+#Cell
+def ImageBlock(cls=PILImage, size=None, cache=None):
+    "`TransformBlock` for images of `cls`, opened from `cache` and decoded at a reduced scale that still cover `size` if passed"
+    return TransformBlock(type_tfms=cls.create if size is None else partial(cls.create, size=size, cache=cache),
+                          item_tfms=_CheckByteImage, batch_tfms=IntToFloatTensor)
 
 #Cell
 MaskBlock = TransformBlock(type_tfms=PILMask.create, batch_tfms=IntToFloatTensor)
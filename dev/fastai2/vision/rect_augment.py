@@ -0,0 +1,132 @@
+#AUTOGENERATED! DO NOT EDIT! File to edit: dev/09c_vision_rect_augment.ipynb (unless otherwise specified).
+
+__all__ = ['AspectRatioDL']
+
+#Cell
+from ..test import *
+from ..torch_basics import *
+from ..data.all import *
+
+from .core import *
+from .data import *
+from .augment import *
+
+#Cell
+def _image_size(fn):
+    "Size (height, width) of the image in `fn`, only reading its header"
+    with Image.open(fn) as im: w,h = im.size
+    return h,w
+
+#Cell
+def _fn_reader(dataset):
+    "The `ColReader` getting the filenames from the rows of `dataset.items` (the first one of its first `TfmdList`), if any"
+    tl = getattr(dataset, 'tls', [dataset])[0]
+    for t in getattr(getattr(tl, 'tfms', None), 'fs', []):
+        if isinstance(getattr(t, 'init_enc', None), ColReader): return t.init_enc
+
+#Cell
+def _bucket_size(size, ratio, round_mult=32):
+    "Size (height, width) of about as many pixels as `size`, with an aspect ratio (width/height) of `ratio`, rounded to `round_mult`"
+    px = size[0]*size[1]
+    return tuple(max(round_mult, round_multiple(o, round_mult)) for o in (math.sqrt(px/ratio), math.sqrt(px*ratio)))
+
+#Cell
+@delegates()
+class AspectRatioDL(TfmdDL):
+    "`TfmdDL` batching images of similar aspect ratios, resized to a common rectangular size of about as many pixels as `size`"
+    packs_batches = True
+    def __init__(self, dataset, size=224, n_buckets=8, max_ratio=2., round_mult=32, method=ResizeMethod.Crop, sizes=None,
+                 size_func=None, n_workers=0, sizes_path=None, **kwargs):
+        super().__init__(dataset, **kwargs)
+        # Each batch is resized to the size of its bucket, which a square resize of the items would undo
+        sq = self.after_item.fs.filter(lambda t: isinstance(t, (Resize,RandomResizedCrop)))
+        if sq:
+            warn(f"`AspectRatioDL` resizes the items itself, so {list(sq)} were removed from `after_item`")
+            self.after_item.fs = self.after_item.fs.filter(lambda t: t not in sq)
+        if isinstance(size,int): size = (size,size)
+        store_attr(self, 'size,n_buckets,max_ratio,round_mult,method,size_func,n_workers,sizes_path')
+        self._sizes,self._buckets = None if sizes is None else np.array(sizes).reshape(-1,2),None
+
+    @classmethod
+    def draft_size(cls, size=224, **kwargs):
+        "Size JPEGs can be decoded at: the smallest side of the images of a bucket is at most `size`"
+        return (size,size) if isinstance(size,int) else tuple(size)
+
+    @property
+    def sizes(self):
+        "Size (height, width) of each image of the dataset"
+        if self._sizes is None: self._sizes = self._get_sizes()
+        return self._sizes
+
+    def _get_sizes(self):
+        items = getattr(self.dataset, 'items', self.dataset)
+        if isinstance(items, pd.DataFrame):
+            # The rows are read by filename when there is a `ColReader` for it, and by their values otherwise
+            f = _fn_reader(self.dataset)
+            items = [o if f is None else f(o) for o in items.itertuples(index=False)]
+        p,keys = None if self.sizes_path is None else Path(self.sizes_path),[o if isinstance(o,tuple) else str(o) for o in items]
+        cache = {}
+        if p is not None and p.exists():
+            with open(p, 'rb') as f: cache = pickle.load(f)
+        todo = [i for i,k in enumerate(keys) if k not in cache]
+        if len(todo)>0:
+            res = parallel(ifnone(self.size_func, _image_size), [items[i] for i in todo], n_workers=self.n_workers, progress=False)
+            cache.update({keys[i]:tuple(o) for i,o in zip(todo, res)})
+            if p is not None:
+                tmp = p.parent/f'{p.name}.{os.getpid()}.tmp'
+                with open(tmp, 'wb') as f: pickle.dump(cache, f)
+                os.replace(tmp, p)
+        return np.array([cache[k] for k in keys], dtype=np.int64).reshape(-1,2)
+
+    @property
+    def buckets(self):
+        "Bucket of each item and size (height, width) of each bucket, by increasing aspect ratio"
+        if self._buckets is None: self._buckets = self._get_buckets()
+        return self._buckets
+
+    def _get_buckets(self):
+        if len(self.sizes)==0: return np.zeros(0, dtype=np.int64),[]
+        r = np.log(np.clip(self.sizes[:,1]/self.sizes[:,0], 1/self.max_ratio, self.max_ratio))
+        grp = np.searchsorted(np.quantile(r, np.linspace(0, 1, self.n_buckets+1)[1:-1]), r, side='right')
+        szs = {g:_bucket_size(self.size, math.exp(np.median(r[grp==g])), self.round_mult) for g in np.unique(grp)}
+        # Buckets rounded to the same size are merged
+        bszs = sorted(set(szs.values()), key=lambda o: o[1]/o[0])
+        return np.array([bszs.index(szs[g]) for g in grp]),bszs
+
+    def get_idxs(self):
+        "Batches of the epoch, as pairs of the `Resize` of their bucket and the indices of their items"
+        bkt,bszs = self.buckets
+        rng = np.random.RandomState(copy(self.rng).randint(0,2**32-1)) if self.shuffle else None
+        res = []
+        for i,sz in enumerate(bszs):
+            idxs = np.nonzero(bkt==i)[0]
+            if self.shuffle: idxs = rng.permutation(idxs)
+            n,rsz = len(idxs)//self.bs*self.bs if self.drop_last else len(idxs),Resize(sz, method=self.method)
+            res += [(rsz,idxs[j:j+self.bs].tolist()) for j in range(0, n, self.bs)]
+        return [res[i] for i in rng.permutation(len(res))] if self.shuffle else res
+
+    def sample(self):
+        idxs = self.get_idxs() if self._idxs is None else self._idxs[self._n_skip:]
+        return (b for i,b in enumerate(idxs) if i%self.nw==self.offs)
+
+    def create_batches(self, samps):
+        # No `super()` here: `DistributedDL.from_dl` binds this method to other loaders
+        self.it,split_idx = None,getattr(self.dataset, 'split_idx', None)
+        for rsz,idxs in samps:
+            # `Resize` keeps a state between its calls, so each batch (that may be made in a thread) uses its own copy
+            rsz,b = deepcopy(rsz),[]
+            for i in idxs:
+                try: b.append(self.after_item(rsz(self.create_item(i), split_idx=split_idx)))
+                except SkipItemException: pass
+            if b: yield self.do_batch(b)
+
+    def __len__(self):
+        if self._idxs is not None: return len(self._idxs)
+        bkt,bszs = self.buckets
+        n = np.bincount(bkt, minlength=len(bszs))
+        return int((n//self.bs if self.drop_last else (n+self.bs-1)//self.bs).sum())
+
+    def new(self, dataset=None, cls=None, **kwargs):
+        if cls is None or issubclass(cls, AspectRatioDL):
+            kwargs = merge(attrdict(self, 'size','n_buckets','max_ratio','round_mult','method','size_func','n_workers','sizes_path'), kwargs)
+        return super().new(dataset=dataset, cls=cls, **kwargs)
\ No newline at end of file
@@ -1,6 +1,6 @@
 #AUTOGENERATED! DO NOT EDIT! File to edit: dev/09b_vision_utils.ipynb (unless otherwise specified).
 
-__all__ = ['download_images', 'resize_to', 'verify_image', 'verify_images']
+__all__ = ['download_images', 'resize_to', 'verify_image', 'verify_images', 'ImageCache']
 
 #Cell
 from ..test import *
@@ -77,4 +77,85 @@ def verify_images(path, max_workers=4, recurse=False, dest='.', **kwargs):
     os.makedirs(dest, exist_ok=True)
     files = get_image_files(path, recurse=recurse)
     func = partial(verify_image, dest=dest, **kwargs)
-    parallel(func, files, max_workers=max_workers)
\ No newline at end of file
+    parallel(func, files, max_workers=max_workers)
+
+#Cell
+def _cache_image(fn, path, sizes, interp=Image.BILINEAR, **kwargs):
+    try:
+        st,b = os.stat(fn),Path(fn).read_bytes()
+        h,suff = hashlib.md5(b).hexdigest(),Path(fn).suffix
+        im = Image.open(io.BytesIO(b))
+        res = dict(mtime=st.st_mtime, fsize=st.st_size, hash=h, suffix=suff, size=im.size, versions={})
+        img = None
+        for s in [s for s in sorted(sizes) if s<max(im.size)]:
+            new_sz,dest = resize_to(im, s),path/str(s)/h[:2]/f'{h}{suff}'
+            if not dest.exists():
+                if img is None: img = load_image(io.BytesIO(b), size=resize_to(im, max(sizes))[::-1])
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                tmp = dest.with_name(f'{os.getpid()}_{dest.name}')
+                img.resize(new_sz, resample=interp).save(tmp, im.format, **kwargs)
+                os.replace(tmp, dest)
+            res['versions'][s] = new_sz
+        return res
+    except Exception as e: return e
+
+#Cell
+class ImageCache():
+    "Cache of images resized to each max size in `sizes`, stored in `path` under the hash of their content"
+    def __init__(self, path=None, sizes=(160,320)):
+        self.path,self.sizes,self._index,self.failed = Path(ifnone(path, Config.config_path/'image_cache')),sorted(sizes),None,L()
+
+    @property
+    def index(self):
+        "Dictionary from the absolute paths of the originals to their cache entry"
+        if self._index is None:
+            fn = self.path/'index.pkl'
+            if not fn.exists(): self._index = {}
+            else:
+                with open(fn, 'rb') as f: self._index = pickle.load(f)
+        return self._index
+
+    def _fresh(self, fn, e):
+        st = os.stat(fn)
+        return st.st_mtime==e['mtime'] and st.st_size==e['fsize']
+
+    def _done(self, fn):
+        e = self.index.get(fn)
+        return e is not None and self._fresh(fn, e) and all(s in e['versions'] for s in self.sizes if s<max(e['size']))
+
+    @delegates(Image.Image.save)
+    def build(self, files, n_workers=None, interp=Image.BILINEAR, progress=True, **kwargs):
+        "Add the versions of `files` missing from the cache, resizing them in parallel with `n_workers` (`defaults.cpus` by default)"
+        self.failed = L()
+        todo = L(files).map(os.path.abspath).filter(lambda o: not self._done(o))
+        if len(todo)==0: return self
+        f = partial(_cache_image, path=self.path, sizes=self.sizes, interp=interp, **kwargs)
+        for fn,e in zip(todo, parallel(f, todo, n_workers=ifnone(n_workers, defaults.cpus), progress=progress)):
+            if isinstance(e, Exception):
+                self.failed.append((fn,e))
+                continue
+            old = self.index.get(fn)
+            if old is not None and old['hash']==e['hash']: e['versions'] = {**old['versions'], **e['versions']}
+            self.index[fn] = e
+        self.save()
+        if self.failed: warn(f"{len(self.failed)} image(s) couldn't be cached (see `ImageCache.failed`), the first one is {self.failed[0][0]}: {self.failed[0][1]}")
+        return self
+
+    def save(self):
+        "Save the index of the cache in `path`"
+        self.path.mkdir(parents=True, exist_ok=True)
+        tmp = self.path/f'index.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f: pickle.dump(self.index, f)
+        os.replace(tmp, self.path/'index.pkl')
+
+    def lookup(self, fn, size):
+        "Smallest version of `fn` in the cache covering `size` (as height,width), or `fn` itself if there is none"
+        h,w = (size,size) if isinstance(size,int) else size
+        e = self.index.get(os.path.abspath(fn))
+        if e is None or not self._fresh(fn, e): return fn
+        for s,(vw,vh) in sorted(e['versions'].items()):
+            if vw>=w and vh>=h: return self.path/str(s)/e['hash'][:2]/f"{e['hash']}{e['suffix']}"
+        return fn
+
+    def __enter__(self): self.old,defaults.image_cache = defaults.image_cache,self; return self
+    def __exit__(self, *args): defaults.image_cache = self.old
\ No newline at end of file